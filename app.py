@@ -1,46 +1,89 @@
 import os
-import neo4j
 import asyncio
-import json
 import streamlit as st
-from dotenv import load_dotenv
-from neo4j_graphrag.llm import OpenAILLM
-from neo4j_graphrag.embeddings import OpenAIEmbeddings
-from neo4j_graphrag.generation import GraphRAG
-from neo4j_graphrag.retrievers import VectorRetriever
-
-# Charger les variables d'environnement
-load_dotenv()
-
-# Connexion à Neo4j
-neo4j_driver = neo4j.GraphDatabase.driver(
-    os.getenv("NEO4J_URI"),
-    auth=(os.getenv("NEO4J_USERNAME"), os.getenv("NEO4J_PASSWORD"))
-)
-
-# Configuration du modèle de langage
-llm = OpenAILLM(
-    model_name="gpt-4o-mini",
-    model_params={"temperature": 0}
-)
-
-# Configuration de l'embedder avec la bonne dimension
-embedder = OpenAIEmbeddings(model="text-embedding-3-large")
+
 INDEX_NAME = "my_vector_index"  # Assurez-vous que le nom correspond à l'index créé dans Neo4j
 
-# Initialisation du retriever avec la bonne dimension
-retriever = VectorRetriever(driver=neo4j_driver, index_name=INDEX_NAME, embedder=embedder)
+# Les modules neo4j_graphrag / openai et les clients ne sont chargés qu'à la première question,
+# puis conservés par Streamlit entre les reruns et les sessions
+@st.cache_resource
+def get_rag():
+    import neo4j
+    from dotenv import load_dotenv
+    from neo4j_graphrag.llm import OpenAILLM
+    from neo4j_graphrag.embeddings import OpenAIEmbeddings
+    from neo4j_graphrag.generation import GraphRAG
+    from reranking import RerankingRetriever
+    from embedding_config import get_embedding_model
+
+    # Charger les variables d'environnement
+    load_dotenv()
+
+    # Connexion à Neo4j
+    neo4j_driver = neo4j.GraphDatabase.driver(
+        os.getenv("NEO4J_URI"),
+        auth=(os.getenv("NEO4J_USERNAME"), os.getenv("NEO4J_PASSWORD"))
+    )
+
+    # Configuration du modèle de langage
+    llm = OpenAILLM(
+        model_name="gpt-4o-mini",
+        model_params={"temperature": 0}
+    )
+
+    # Configuration de l'embedder : même modèle que l'ingestion et l'index (EMBEDDING_MODEL)
+    embedder = OpenAIEmbeddings(model=get_embedding_model())
 
-# Initialisation de GraphRAG
-rag = GraphRAG(retriever=retriever, llm=llm)
+    # Partition interrogée (TENANT=fette, alzheimer, phee) ; par défaut l'index commun
+    index_name, database = INDEX_NAME, None
+    if os.getenv("TENANT"):
+        from tenants import get_tenant
+        tenant = get_tenant(os.getenv("TENANT"))
+        index_name, database = tenant.index_name, tenant.database
 
-async def query_graph(question: str):
+    # Initialisation du retriever avec la bonne dimension
+    # 20 candidats sont diversifiés par MMR (les rapports d'intervention se ressemblent beaucoup),
+    # éventuellement rerankés par un cross-encoder local sur CPU (ex. CROSS_ENCODER_MODEL=cross-encoder/mmarco-mMiniLMv2-L12-H384-v1),
+    # puis limités à 1500 tokens de contexte
+    retriever = RerankingRetriever(
+        driver=neo4j_driver,
+        index_name=index_name,
+        embedder=embedder,
+        neo4j_database=database,
+        fetch_k=20,
+        cross_encoder=os.getenv("CROSS_ENCODER_MODEL"),
+        token_budget=1500,
+        # "pannes du dernier trimestre" : seuls les chunks datés de la période sont comparés à la question
+        date_property="date",
+    )
+
+    # Initialisation de GraphRAG
+    return GraphRAG(retriever=retriever, llm=llm)
+
+async def query_graph(question: str, rag=None):
     """
     Fonction qui prend une question en langage naturel et retourne une réponse basée sur le graphe Neo4j
+
+    `rag` permet de fournir un autre GraphRAG que celui de l'application (ex. backends simulés de load_test.py)
     """
+    from usage_tracking import UsageTracker, version_of
+
     try:
+        rag = rag or get_rag()
+        # Comptage des tokens et du coût de la question (embedding de la question + génération)
+        usage_tracker = UsageTracker("app", schema_version=rag.retriever.index_name, prompt_version=version_of(rag.prompt_template.template))
+        usage_tracker.wrap_llm(rag.llm)
+        usage_tracker.wrap_embedder(rag.retriever.embedder)
+
         # Exécuter la requête avec GraphRAG
-        response = rag.search(query_text=question, retriever_config={"top_k": 5})
+        with usage_tracker.record(question):
+            response = rag.search(query_text=question, retriever_config={"top_k": 5}, return_context=True)
+        usage_tracker.save()
+        metadata = response.retriever_result.metadata or {}
+        if not response.retriever_result.items and metadata.get("time_window"):
+            # Question limitée à une période sans aucune intervention enregistrée
+            start, end = metadata["time_window"]
+            return f"Aucune intervention enregistrée entre le {start} et le {end}."
         return response.answer
     except Exception as e:
         return f"Erreur lors de l'interrogation du graphe : {str(e)}"
@@ -0,0 +1,206 @@
+"""Ré-encodage des noeuds Chunk avec un nouveau modèle d'embedding, sans interrompre le chatbot.
+
+Les nouveaux vecteurs sont écrits dans une propriété de travail (`embedding_next`) pendant que
+l'index actuel continue de servir les questions. Une fois tous les chunks encodés, la bascule
+recrée l'index à la nouvelle dimension et recopie les vecteurs dans `embedding`, sans appel à l'API.
+
+    python embedding_backfill.py --model text-embedding-3-large
+    EMBEDDING_MODEL=text-embedding-3-large    # ensuite, pour l'ingestion et le chatbot
+"""
+import os, neo4j, asyncio, argparse, time
+from dotenv import load_dotenv
+from openai import AsyncOpenAI
+from neo4j_graphrag.indexes import create_vector_index, drop_index_if_exists
+
+from embedding_config import get_dimensions, get_embedding_model
+
+INDEX_NAME = "my_vector_index"
+STAGING_PROPERTY = "embedding_next"
+
+# Index créé par le Neo4jWriter de neo4j_graphrag sur l'identifiant de tous les noeuds qu'il écrit
+KEY_INDEX_QUERY = "CREATE INDEX __entity__id IF NOT EXISTS FOR (n:__KGBuilder__) ON (n.id)"
+
+# Lecture paginée sur l'identifiant indexé des chunks : chaque page est lue dans l'index, sans trier tous
+# les chunks. Les chunks déjà encodés avec le modèle cible (en place ou en attente de bascule) sont
+# ignorés, ce qui rend le job reprenable après une interruption
+FETCH_QUERY = """
+MATCH (c:__KGBuilder__:{label})
+WHERE c.id > $last_key
+  AND coalesce(c.embedding_model, '') <> $model AND coalesce(c.embedding_next_model, '') <> $model
+RETURN c.id AS key, elementId(c) AS id, c.text AS text
+ORDER BY c.id
+LIMIT $page_size
+"""
+
+WRITE_QUERY = """
+UNWIND $rows AS row
+MATCH (c) WHERE elementId(c) = row.id
+CALL db.create.setNodeVectorProperty(c, 'embedding_next', row.embedding)
+SET c.embedding_next_model = $model
+"""
+
+# Bascule par lots : le vecteur de travail remplace l'embedding servi par l'index
+SWAP_QUERY = """
+MATCH (c:{label})
+WHERE c.embedding_next_model = $model
+WITH c LIMIT $batch_size
+CALL db.create.setNodeVectorProperty(c, 'embedding', c.embedding_next)
+SET c.embedding_model = c.embedding_next_model
+REMOVE c.embedding_next, c.embedding_next_model
+RETURN count(c) AS count
+"""
+
+REMAINING_QUERY = """
+MATCH (c:{label})
+WHERE coalesce(c.embedding_model, '') <> $model
+RETURN count(c) AS count
+"""
+
+INDEX_DIMENSIONS_QUERY = """
+SHOW VECTOR INDEXES YIELD name, options
+WHERE name = $name
+RETURN options.indexConfig['vector.dimensions'] AS dimensions
+"""
+
+
+def fetch_pages(driver, model, page_size, label="Chunk", database=None):
+    """Parcourt les noeuds Chunk à ré-encoder page par page"""
+    driver.execute_query(KEY_INDEX_QUERY, database_=database)
+    last_key = ""
+    while True:
+        records, _, _ = driver.execute_query(
+            FETCH_QUERY.format(label=label), last_key=last_key, model=model, page_size=page_size, database_=database
+        )
+        if not records:
+            return
+        yield [(record["id"], record["text"] or " ") for record in records]
+        last_key = records[-1]["key"]
+
+
+async def embed_batch(client, semaphore, model, batch):
+    """Encode un lot de chunks en un seul appel à l'API"""
+    async with semaphore:
+        response = await client.embeddings.create(model=model, input=[text for _, text in batch])
+    return [
+        {"id": chunk_id, "embedding": item.embedding}
+        for (chunk_id, _), item in zip(batch, sorted(response.data, key=lambda d: d.index))
+    ]
+
+
+def index_dimensions(driver, index_name, database=None):
+    """Dimension d'un index vectoriel existant, ou None s'il n'existe pas"""
+    records, _, _ = driver.execute_query(INDEX_DIMENSIONS_QUERY, name=index_name, database_=database)
+    return records[0]["dimensions"] if records else None
+
+
+def swap_embeddings(driver, model, index_name=INDEX_NAME, label="Chunk", database=None, batch_size=5000,
+                    create_index=None):
+    """Bascule les vecteurs de travail dans `embedding` et met l'index à la dimension de `model`.
+
+    L'index n'est supprimé que s'il n'a pas la bonne dimension, et recréé aussitôt : il n'est absent
+    que le temps de deux requêtes de schéma. Pendant la recopie (locale, sans appel à l'API), il ne
+    contient que les chunks déjà basculés.
+    """
+    dimensions = get_dimensions(model)
+    if index_dimensions(driver, index_name, database) != dimensions:
+        drop_index_if_exists(driver, index_name, neo4j_database=database)
+        if create_index is not None:
+            create_index(dimensions)
+        else:
+            create_vector_index(
+                driver,
+                index_name,
+                label=label,
+                embedding_property="embedding",
+                dimensions=dimensions,
+                similarity_fn="cosine",
+                neo4j_database=database,
+            )
+        print(f"Index {index_name} recréé ({dimensions} dimensions)")
+
+    total = 0
+    while True:
+        records, _, _ = driver.execute_query(
+            SWAP_QUERY.format(label=label), model=model, batch_size=batch_size, database_=database
+        )
+        if records[0]["count"] == 0:
+            break
+        total += records[0]["count"]
+        print(f"{total} chunks basculés")
+    records, _, _ = driver.execute_query(REMAINING_QUERY.format(label=label), model=model, database_=database)
+    if records[0]["count"]:
+        # Chunks ingérés avec l'ancien modèle pendant le job : hors de l'index jusqu'au prochain passage
+        print(f"{records[0]['count']} chunks ne sont pas encore encodés avec {model} : relancer le job")
+    return total
+
+
+async def backfill(driver, model=None, page_size=2000, batch_size=256, concurrency=8, index_name=INDEX_NAME,
+                   tenant=None):
+    """Ré-encode tous les chunks avec `model` (par défaut le modèle configuré) dans la propriété de travail,
+    puis bascule index et vecteurs (voir swap_embeddings).
+
+    Avec un tenant, seuls ses chunks sont ré-encodés et c'est son index qui est basculé.
+    """
+    model = model or get_embedding_model()
+    get_dimensions(model)   # modèle inconnu : erreur avant le moindre appel à l'API
+
+    label, database, create_index = "Chunk", None, None
+    if tenant is not None:
+        from tenants import create_tenant_index
+
+        label, index_name, database = f"`{tenant.chunk_label}`", tenant.index_name, tenant.database
+        create_index = lambda dimensions: create_tenant_index(driver, tenant, dimensions)
+
+    client = AsyncOpenAI()
+    semaphore = asyncio.Semaphore(concurrency)
+    total = 0
+    start = time.perf_counter()
+    for page in fetch_pages(driver, model, page_size, label, database):
+        batches = [page[i:i + batch_size] for i in range(0, len(page), batch_size)]
+        results = await asyncio.gather(*(embed_batch(client, semaphore, model, b) for b in batches))
+        rows = [row for result in results for row in result]
+        driver.execute_query(WRITE_QUERY, rows=rows, model=model, database_=database)
+        total += len(rows)
+        print(f"{total} chunks ré-encodés ({total / (time.perf_counter() - start):.0f} chunks/s)")
+
+    swapped = swap_embeddings(driver, model, index_name, label, database, create_index=create_index)
+    print(f"Index {index_name} basculé - {total} chunks ré-encodés, {swapped} basculés avec {model}")
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ré-encode les noeuds Chunk avec un nouveau modèle d'embedding")
+    parser.add_argument("--model", help="modèle cible (par défaut EMBEDDING_MODEL, voir embedding_config.py)")
+    parser.add_argument("--page-size", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--index-name", default=INDEX_NAME)
+    parser.add_argument("--tenant", help="ne ré-encode que les chunks de cette partition (voir tenants.py)")
+    parser.add_argument("--all-tenants", action="store_true",
+                        help="ré-encode les chunks communs puis ceux de chaque partition, index compris")
+    args = parser.parse_args()
+
+    from tenants import TENANTS, get_tenant
+
+    tenants = [get_tenant(args.tenant)] if args.tenant else []
+    if args.all_tenants:
+        tenants = [None] + list(TENANTS.values())
+
+    load_dotenv()
+    neo4j_driver = neo4j.GraphDatabase.driver(
+        os.getenv("NEO4J_URI"),
+        auth=(os.getenv("NEO4J_USERNAME"), os.getenv("NEO4J_PASSWORD"))
+    )
+    try:
+        for tenant in tenants or [None]:
+            asyncio.run(backfill(
+                neo4j_driver,
+                args.model,
+                page_size=args.page_size,
+                batch_size=args.batch_size,
+                concurrency=args.concurrency,
+                index_name=args.index_name,
+                tenant=tenant,
+            ))
+    finally:
+        neo4j_driver.close()
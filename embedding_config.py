@@ -0,0 +1,33 @@
+"""Modèle d'embedding commun à l'ingestion, au chatbot et au ré-encodage (variable EMBEDDING_MODEL).
+
+Les chunks et les questions doivent être encodés par le même modèle : Neo4j ignore sans erreur un
+vecteur dont la dimension n'est pas celle de l'index. Après un ré-encodage (embedding_backfill.py),
+on change EMBEDDING_MODEL une fois l'index basculé.
+"""
+import os
+
+# Dimensions des modèles d'embedding OpenAI
+MODEL_DIMENSIONS = {
+    "text-embedding-ada-002": 1536,
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+}
+
+DEFAULT_EMBEDDING_MODEL = "text-embedding-3-large"
+
+
+def get_embedding_model():
+    """Modèle configuré : variable EMBEDDING_MODEL (ou .env), text-embedding-3-large par défaut"""
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    return os.getenv("EMBEDDING_MODEL", DEFAULT_EMBEDDING_MODEL)
+
+
+def get_dimensions(model=None):
+    """Dimension des vecteurs de `model` (par défaut le modèle configuré)"""
+    model = model or get_embedding_model()
+    try:
+        return MODEL_DIMENSIONS[model]
+    except KeyError:
+        raise ValueError(f"Unknown embedding model: {model}. Known models: {', '.join(sorted(MODEL_DIMENSIONS))}")
@@ -0,0 +1,292 @@
+"""Validation et réparation du JSON produit par le LLM pendant l'extraction, sans rappeler le modèle.
+
+La réponse est d'abord réparée localement (bloc ```json, texte autour, puis json_repair pour les
+virgules finales, guillemets et accolades manquantes), puis confrontée au schéma : labels et types de relations mal orthographiés sont ramenés
+au schéma, les relations qui désignent un noeud par son nom plutôt que par son id sont rattachées.
+Seuls les éléments irréparables, ou une réponse illisible, sont renvoyés au LLM, dans un prompt réduit.
+"""
+import re, json, logging, unicodedata
+from dataclasses import dataclass, field
+
+from neo4j_graphrag.experimental.components.entity_relation_extractor import (
+    LLMEntityRelationExtractor,
+    OnError,
+    fix_invalid_json,
+)
+from neo4j_graphrag.experimental.components.types import Neo4jGraph
+from neo4j_graphrag.experimental.pipeline.exceptions import InvalidJSONError
+from neo4j_graphrag.exceptions import LLMGenerationError
+
+logger = logging.getLogger(__name__)
+
+FENCE_PATTERN = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$")
+# Extrait de réponse illisible recopié dans le prompt de réparation
+MAX_INVALID_RESPONSE_CHARS = 4000
+
+# Clés utilisées par le LLM à la place de celles attendues
+NODE_LABEL_KEYS = ("label", "type", "labels")
+START_KEYS = ("start_node_id", "start_node", "source", "start", "from")
+END_KEYS = ("end_node_id", "end_node", "target", "end", "to")
+
+REPAIR_PROMPT = '''
+Une extraction de graphe réalisée sur le texte ci-dessous contient des éléments qui ne respectent pas le schéma.
+Corrigez UNIQUEMENT ces éléments et retournez-les dans un JSON valide {{"nodes": [...], "relationships": [...]}}.
+
+Labels de noeuds autorisés : {labels}
+Types de relations autorisés : {relation_types}
+
+Noeuds déjà validés (réutilisez leurs id dans les relations, ne les renvoyez pas) :
+{valid_nodes}
+
+Éléments à corriger et problèmes constatés :
+{rejected}
+
+Texte :
+{text}
+'''
+
+
+def parse_llm_json(content):
+    """Parse la réponse du LLM ; retourne (données, réparée) ou lève InvalidJSONError"""
+    try:
+        data, repaired = json.loads(content), False
+    except json.JSONDecodeError:
+        repaired = True
+        text = FENCE_PATTERN.sub("", content.strip())
+        start, end = text.find("{"), text.rfind("}")
+        if start != -1:
+            text = text[start:end + 1] if end > start else text[start:]
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError:
+            # Réparation générique qui respecte les chaînes (virgules finales, guillemets simples,
+            # accolades manquantes...)
+            try:
+                data = json.loads(fix_invalid_json(text))
+            except json.JSONDecodeError as e:
+                raise InvalidJSONError(str(e)) from e
+    if not isinstance(data, dict):
+        raise InvalidJSONError(f"Expected a JSON object, got {type(data).__name__}")
+    return data, repaired
+
+
+def normalize(value):
+    """Clé de comparaison insensible à la casse, aux accents et à la ponctuation"""
+    value = unicodedata.normalize("NFKD", str(value)).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^a-z0-9]", "", value.lower())
+
+
+def _first(item, keys):
+    for key in keys:
+        if item.get(key) is not None:
+            return item[key]
+    return None
+
+
+@dataclass
+class ValidationResult:
+    nodes: list = field(default_factory=list)
+    relationships: list = field(default_factory=list)
+    fixes: int = 0
+    # (élément brut, problème) à renvoyer au LLM
+    rejected: list = field(default_factory=list)
+
+
+def validate_graph(data, labels=(), relation_types=(), known_nodes=()):
+    """Confronte le graphe extrait au schéma et répare ce qui peut l'être.
+
+    Un schéma vide (labels ou types de relations) n'impose pas de contrainte. `known_nodes`
+    contient les noeuds déjà validés auxquels les relations peuvent se rattacher.
+    """
+    result = ValidationResult()
+    label_keys = {normalize(label): label for label in labels}
+    relation_keys = {normalize(rel_type): rel_type for rel_type in relation_types}
+
+    node_ids = {node["id"] for node in known_nodes}
+    ids_by_name = {}
+    for node in known_nodes:
+        if node["properties"].get("name"):
+            ids_by_name.setdefault(normalize(node["properties"]["name"]), node["id"])
+    rejected_ids = set()
+
+    raw_nodes = data.get("nodes") or []
+    raw_relationships = data.get("relationships") or []
+    if not isinstance(raw_nodes, list) or not isinstance(raw_relationships, list):
+        result.rejected.append((data, "nodes et relationships doivent être des listes"))
+        return result
+    if "nodes" not in data or "relationships" not in data:
+        result.fixes += 1
+
+    for index, raw in enumerate(raw_nodes):
+        if not isinstance(raw, dict):
+            result.rejected.append((raw, "noeud qui n'est pas un objet"))
+            continue
+        node_id = raw.get("id")
+        if node_id is None or node_id == "":
+            node_id, result.fixes = f"n{index}", result.fixes + 1
+        elif not isinstance(node_id, str):
+            node_id, result.fixes = str(node_id), result.fixes + 1
+        properties = raw.get("properties")
+        if not isinstance(properties, dict):
+            properties = {}
+            result.fixes += raw.get("properties") is not None
+        # Nom placé à la racine du noeud plutôt que dans ses propriétés
+        if "name" not in properties and isinstance(raw.get("name"), str):
+            properties["name"], result.fixes = raw["name"], result.fixes + 1
+        properties = {key: value for key, value in properties.items() if value is not None}
+
+        label = _first(raw, NODE_LABEL_KEYS)
+        if isinstance(label, list):
+            label = label[0] if label else None
+        if label_keys and label not in labels:
+            if normalize(label) in label_keys:
+                label, result.fixes = label_keys[normalize(label)], result.fixes + 1
+            else:
+                rejected_ids.add(node_id)
+                result.rejected.append((raw, f"label {label!r} absent du schéma"))
+                continue
+        if not label:
+            rejected_ids.add(node_id)
+            result.rejected.append((raw, "noeud sans label"))
+            continue
+        if node_id in node_ids:
+            # Doublon : le LLM a répété un noeud déjà extrait
+            result.fixes += 1
+            continue
+
+        node_ids.add(node_id)
+        if properties.get("name"):
+            ids_by_name.setdefault(normalize(properties["name"]), node_id)
+        result.nodes.append({"id": node_id, "label": label, "properties": properties})
+
+    seen = set()
+    for raw in raw_relationships:
+        if not isinstance(raw, dict):
+            result.rejected.append((raw, "relation qui n'est pas un objet"))
+            continue
+        endpoints = []
+        for keys in (START_KEYS, END_KEYS):
+            node_ref = _first(raw, keys)
+            node_ref = None if node_ref is None else str(node_ref)
+            if node_ref is not None and node_ref != raw.get(keys[0]):
+                result.fixes += 1
+            if node_ref not in node_ids and node_ref is not None and normalize(node_ref) in ids_by_name:
+                # Relation qui désigne le noeud par son nom
+                node_ref, result.fixes = ids_by_name[normalize(node_ref)], result.fixes + 1
+            endpoints.append(node_ref)
+        start_id, end_id = endpoints
+
+        rel_type = raw.get("type")
+        if relation_keys and rel_type not in relation_types:
+            if normalize(rel_type) in relation_keys:
+                rel_type, result.fixes = relation_keys[normalize(rel_type)], result.fixes + 1
+            else:
+                result.rejected.append((raw, f"type de relation {rel_type!r} absent du schéma"))
+                continue
+        if not rel_type:
+            result.rejected.append((raw, "relation sans type"))
+            continue
+        if start_id in rejected_ids or end_id in rejected_ids:
+            result.rejected.append((raw, "relation vers un noeud rejeté"))
+            continue
+        if start_id not in node_ids or end_id not in node_ids:
+            result.rejected.append((raw, f"relation pendante ({start_id!r} -> {end_id!r})"))
+            continue
+        if (start_id, rel_type, end_id) in seen:
+            result.fixes += 1
+            continue
+
+        seen.add((start_id, rel_type, end_id))
+        properties = raw.get("properties") if isinstance(raw.get("properties"), dict) else {}
+        result.relationships.append({
+            "type": rel_type,
+            "start_node_id": start_id,
+            "end_node_id": end_id,
+            "properties": {key: value for key, value in properties.items() if value is not None},
+        })
+    return result
+
+
+@dataclass
+class ValidationStats:
+    """Statistiques cumulées de validation, pour suivre la qualité des réponses du LLM"""
+    chunks: int = 0
+    valid: int = 0
+    repaired: int = 0
+    repair_calls: int = 0
+    unparsable: int = 0
+    dropped: int = 0
+
+    def report(self):
+        return (
+            f"{self.chunks} réponses, {self.valid} valides, {self.repaired} réparées localement, "
+            f"{self.repair_calls} rappels du LLM, {self.unparsable} illisibles, {self.dropped} éléments abandonnés"
+        )
+
+
+class ValidatingExtractor(LLMEntityRelationExtractor):
+    """LLMEntityRelationExtractor qui répare la réponse au lieu d'abandonner le graphe du chunk.
+
+    Un seul rappel du LLM par chunk (`max_repair_calls`), limité aux éléments irréparables.
+    """
+
+    def __init__(self, *args, max_repair_calls=1, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_repair_calls = max_repair_calls
+        self.stats = ValidationStats()
+
+    async def extract_for_chunk(self, schema, examples, chunk):
+        self.stats.chunks += 1
+        labels = list(schema.entities)
+        relation_types = list(schema.relations or {})
+        prompt = self.prompt_template.format(text=chunk.text, schema=schema.model_dump(), examples=examples)
+        llm_result = await self.llm.ainvoke(prompt)
+        unparsable = None
+        try:
+            data, repaired = parse_llm_json(llm_result.content)
+            result = validate_graph(data, labels, relation_types)
+        except InvalidJSONError as e:
+            unparsable = e
+            self.stats.unparsable += 1
+            logger.warning(f"LLM response is not valid JSON for chunk_index={chunk.index}, asking for a repair")
+            logger.debug(f"Invalid JSON: {llm_result.content}")
+            # Rien à garder localement : toute la réponse part dans le prompt de réparation
+            repaired, result = False, ValidationResult(rejected=[
+                (llm_result.content[:MAX_INVALID_RESPONSE_CHARS], "réponse qui n'est pas un JSON valide")
+            ])
+        nodes, relationships = result.nodes, result.relationships
+        rejected = result.rejected
+        for _ in range(self.max_repair_calls):
+            if not rejected:
+                break
+            self.stats.repair_calls += 1
+            repair_result = await self.llm.ainvoke(REPAIR_PROMPT.format(
+                labels=", ".join(labels) or "libres",
+                relation_types=", ".join(relation_types) or "libres",
+                valid_nodes=json.dumps(
+                    [{"id": n["id"], "label": n["label"], "name": n["properties"].get("name")} for n in nodes],
+                    ensure_ascii=False,
+                ),
+                rejected="\n".join(f"- {json.dumps(item, ensure_ascii=False)} : {problem}" for item, problem in rejected),
+                text=chunk.text,
+            ))
+            try:
+                repair_data, _ = parse_llm_json(repair_result.content)
+            except InvalidJSONError:
+                break
+            repair = validate_graph(repair_data, labels, relation_types, known_nodes=nodes)
+            nodes, relationships = nodes + repair.nodes, relationships + repair.relationships
+            rejected = repair.rejected
+
+        if unparsable is not None and not nodes and self.on_error == OnError.RAISE:
+            raise LLMGenerationError("LLM response is not valid JSON") from unparsable
+        if rejected:
+            self.stats.dropped += len(rejected)
+            logger.warning(f"{len(rejected)} éléments abandonnés pour chunk_index={chunk.index}")
+            logger.debug(f"Éléments abandonnés : {rejected}")
+        # Les réponses incomplètes sont comptées dans repair_calls et dropped
+        if not result.rejected and (repaired or result.fixes):
+            self.stats.repaired += 1
+        elif not result.rejected:
+            self.stats.valid += 1
+        return Neo4jGraph.model_validate({"nodes": nodes, "relationships": relationships})
@@ -0,0 +1,322 @@
+"""Export / import d'un graphe Neo4j complet en fichiers Parquet, sans repasser par l'extraction LLM.
+
+    python graph_snapshot.py export snapshots/fette
+    python graph_snapshot.py import snapshots/fette
+
+Un snapshot contient nodes.parquet (labels + propriétés JSON), relationships.parquet,
+embeddings.parquet (vecteurs float32 de taille fixe) et manifest.json, qui liste aussi les index
+(vectoriels, de plage...) et contraintes à recréer après l'import.
+"""
+import os, json, time, datetime, argparse
+from collections import defaultdict
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from neo4j.spatial import CartesianPoint, Point, WGS84Point
+from neo4j.time import Duration
+
+PAGE_SIZE = 5000
+EMBEDDING_PROPERTY = "embedding"
+INDEX_NAME = "my_vector_index"
+# Label et propriété temporaires permettant de relier les relations aux noeuds importés
+SNAPSHOT_LABEL = "__Snapshot__"
+SNAPSHOT_ID = "__snapshot_id"
+
+NODE_SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("labels", pa.list_(pa.string())),
+    ("properties", pa.string()),
+])
+RELATIONSHIP_SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("type", pa.string()),
+    ("start_id", pa.string()),
+    ("end_id", pa.string()),
+    ("properties", pa.string()),
+])
+
+# Une seule requête par type d'élément, lue au fil de l'eau : pas de tri ni de pagination sur elementId,
+# qu'aucun index ne couvre
+EXPORT_NODES_QUERY = """
+MATCH (n)
+RETURN elementId(n) AS id, labels(n) AS labels, properties(n) AS properties
+"""
+EXPORT_RELATIONSHIPS_QUERY = """
+MATCH (a)-[r]->(b)
+RETURN elementId(r) AS id, type(r) AS type, elementId(a) AS start_id, elementId(b) AS end_id,
+       properties(r) AS properties
+"""
+
+# Index et contraintes du graphe exporté, sous forme d'instructions CREATE. Les index de lookup existent
+# dans toute base ; les index portés par une contrainte sont recréés avec elle
+INDEXES_QUERY = """
+SHOW INDEXES YIELD name, type, owningConstraint, createStatement
+WHERE type <> 'LOOKUP' AND owningConstraint IS NULL AND name <> 'snapshot_id'
+RETURN name, type, createStatement
+"""
+CONSTRAINTS_QUERY = """
+SHOW CONSTRAINTS YIELD name, type, createStatement
+RETURN name, type, createStatement
+"""
+
+
+# Classe de point Neo4j selon le SRID (2D / 3D)
+POINT_TYPES = {7203: CartesianPoint, 9157: CartesianPoint, 4326: WGS84Point, 4979: WGS84Point}
+
+
+def encode_value(value):
+    """Sérialise les types temporels et spatiaux Neo4j pour qu'ils survivent au passage par JSON"""
+    if isinstance(value, Duration):
+        return {"$duration": value.iso_format()}
+    if isinstance(value, Point):
+        return {"$point": {"srid": value.srid, "coordinates": list(value)}}
+    if hasattr(value, "to_native"):
+        value = value.to_native()
+    if isinstance(value, datetime.datetime):
+        return {"$datetime": value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {"$date": value.isoformat()}
+    if isinstance(value, datetime.time):
+        return {"$time": value.isoformat()}
+    if isinstance(value, list):
+        return [encode_value(v) for v in value]
+    return value
+
+
+def decode_value(value):
+    if isinstance(value, dict):
+        if "$datetime" in value:
+            return datetime.datetime.fromisoformat(value["$datetime"])
+        if "$date" in value:
+            return datetime.date.fromisoformat(value["$date"])
+        if "$time" in value:
+            return datetime.time.fromisoformat(value["$time"])
+        if "$duration" in value:
+            return Duration.from_iso_format(value["$duration"])
+        if "$point" in value:
+            return POINT_TYPES[value["$point"]["srid"]](value["$point"]["coordinates"])
+    if isinstance(value, list):
+        return [decode_value(v) for v in value]
+    return value
+
+
+def dump_properties(properties):
+    return json.dumps({k: encode_value(v) for k, v in properties.items()}, ensure_ascii=False)
+
+
+def load_properties(properties):
+    return {k: decode_value(v) for k, v in json.loads(properties).items()}
+
+
+def stream_batches(driver, query, batch_size=PAGE_SIZE):
+    """Parcourt le résultat de `query` par lots de `batch_size` enregistrements, à mesure qu'ils arrivent"""
+    with driver.session(fetch_size=batch_size) as session:
+        batch = []
+        for record in session.run(query):
+            batch.append(record)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def export_schema(driver, query):
+    records, _, _ = driver.execute_query(query)
+    return [{"name": r["name"], "type": r["type"], "statement": r["createStatement"]} for r in records]
+
+
+def export_graph(driver, folder, page_size=PAGE_SIZE, index_name=INDEX_NAME):
+    """Écrit le graphe dans `folder`, par lots Parquet, sans le charger entièrement en mémoire"""
+    os.makedirs(folder, exist_ok=True)
+    start = time.perf_counter()
+    n_nodes = n_relationships = n_embeddings = 0
+    dimensions = None
+    embeddings_writer = None
+
+    with pq.ParquetWriter(os.path.join(folder, "nodes.parquet"), NODE_SCHEMA) as nodes_writer:
+        for records in stream_batches(driver, EXPORT_NODES_QUERY, page_size):
+            ids, labels, properties, vector_ids, vectors = [], [], [], [], []
+            for record in records:
+                props = dict(record["properties"])
+                embedding = props.pop(EMBEDDING_PROPERTY, None)
+                ids.append(record["id"])
+                labels.append(record["labels"])
+                properties.append(dump_properties(props))
+                if embedding is not None:
+                    if dimensions is None:
+                        dimensions = len(embedding)
+                    if len(embedding) != dimensions:
+                        raise ValueError(f"Node {record['id']} has a {len(embedding)}-dimensional embedding, expected {dimensions}")
+                    vector_ids.append(record["id"])
+                    vectors.extend(embedding)
+            nodes_writer.write_table(pa.table([ids, labels, properties], schema=NODE_SCHEMA))
+
+            if vector_ids:
+                embedding_schema = pa.schema([("id", pa.string()), ("embedding", pa.list_(pa.float32(), dimensions))])
+                if embeddings_writer is None:
+                    embeddings_writer = pq.ParquetWriter(os.path.join(folder, "embeddings.parquet"), embedding_schema)
+                embeddings_writer.write_table(pa.table([
+                    pa.array(vector_ids, pa.string()),
+                    pa.FixedSizeListArray.from_arrays(pa.array(vectors, pa.float32()), dimensions),
+                ], schema=embedding_schema))
+            n_nodes += len(ids)
+            n_embeddings += len(vector_ids)
+            print(f"{n_nodes} noeuds exportés")
+    if embeddings_writer is not None:
+        embeddings_writer.close()
+
+    with pq.ParquetWriter(os.path.join(folder, "relationships.parquet"), RELATIONSHIP_SCHEMA) as relationships_writer:
+        for records in stream_batches(driver, EXPORT_RELATIONSHIPS_QUERY, page_size):
+            relationships_writer.write_table(pa.table([
+                [r["id"] for r in records],
+                [r["type"] for r in records],
+                [r["start_id"] for r in records],
+                [r["end_id"] for r in records],
+                [dump_properties(r["properties"]) for r in records],
+            ], schema=RELATIONSHIP_SCHEMA))
+            n_relationships += len(records)
+            print(f"{n_relationships} relations exportées")
+
+    manifest = {
+        "exported_at": time.time(),
+        "nodes": n_nodes,
+        "relationships": n_relationships,
+        "embeddings": n_embeddings,
+        "embedding_property": EMBEDDING_PROPERTY,
+        "dimensions": dimensions,
+        "index_name": index_name,
+        "indexes": export_schema(driver, INDEXES_QUERY),
+        "constraints": export_schema(driver, CONSTRAINTS_QUERY),
+    }
+    with open(os.path.join(folder, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    print(f"Snapshot écrit dans {folder} en {time.perf_counter() - start:.1f}s : {manifest}")
+    return manifest
+
+
+def _cypher_name(name):
+    return "`" + name.replace("`", "``") + "`"
+
+
+def import_graph(driver, folder, batch_size=PAGE_SIZE):
+    """Charge un snapshot par lots UNWIND puis recrée ses index (dont les index vectoriels) et contraintes"""
+    from neo4j_graphrag.indexes import create_vector_index
+
+    with open(os.path.join(folder, "manifest.json"), encoding="utf-8") as f:
+        manifest = json.load(f)
+    start = time.perf_counter()
+    driver.execute_query(
+        f"CREATE INDEX snapshot_id IF NOT EXISTS FOR (n:{SNAPSHOT_LABEL}) ON (n.{SNAPSHOT_ID})"
+    )
+    driver.execute_query("CALL db.awaitIndexes()")
+
+    # Noeuds : un CREATE par combinaison de labels, les labels ne pouvant pas être paramétrés
+    n_nodes = 0
+    for batch in pq.ParquetFile(os.path.join(folder, "nodes.parquet")).iter_batches(batch_size):
+        groups = defaultdict(list)
+        for node_id, labels, properties in zip(*(batch.column(c).to_pylist() for c in ("id", "labels", "properties"))):
+            groups[tuple(labels)].append({"id": node_id, "properties": load_properties(properties)})
+        for labels, rows in groups.items():
+            label_clause = "".join(":" + _cypher_name(label) for label in (SNAPSHOT_LABEL,) + labels)
+            driver.execute_query(
+                f"UNWIND $rows AS row CREATE (n{label_clause}) SET n = row.properties, n.{SNAPSHOT_ID} = row.id",
+                rows=rows,
+            )
+        n_nodes += batch.num_rows
+        print(f"{n_nodes}/{manifest['nodes']} noeuds importés")
+
+    n_relationships = 0
+    for batch in pq.ParquetFile(os.path.join(folder, "relationships.parquet")).iter_batches(batch_size):
+        groups = defaultdict(list)
+        columns = (batch.column(c).to_pylist() for c in ("type", "start_id", "end_id", "properties"))
+        for rel_type, start_id, end_id, properties in zip(*columns):
+            groups[rel_type].append({"start": start_id, "end": end_id, "properties": load_properties(properties)})
+        for rel_type, rows in groups.items():
+            driver.execute_query(
+                f"""
+                UNWIND $rows AS row
+                MATCH (a:{SNAPSHOT_LABEL} {{{SNAPSHOT_ID}: row.start}})
+                MATCH (b:{SNAPSHOT_LABEL} {{{SNAPSHOT_ID}: row.end}})
+                CREATE (a)-[r:{_cypher_name(rel_type)}]->(b) SET r = row.properties
+                """,
+                rows=rows,
+            )
+        n_relationships += batch.num_rows
+        print(f"{n_relationships}/{manifest['relationships']} relations importées")
+
+    embeddings_path = os.path.join(folder, "embeddings.parquet")
+    if os.path.exists(embeddings_path):
+        n_embeddings = 0
+        for batch in pq.ParquetFile(embeddings_path).iter_batches(batch_size):
+            ids = batch.column("id").to_pylist()
+            vectors = batch.column("embedding").values.to_numpy().reshape(len(ids), manifest["dimensions"])
+            driver.execute_query(
+                f"""
+                UNWIND $rows AS row
+                MATCH (n:{SNAPSHOT_LABEL} {{{SNAPSHOT_ID}: row.id}})
+                CALL db.create.setNodeVectorProperty(n, $property, row.embedding)
+                """,
+                rows=[{"id": i, "embedding": v} for i, v in zip(ids, vectors.tolist())],
+                property=manifest["embedding_property"],
+            )
+            n_embeddings += len(ids)
+            print(f"{n_embeddings}/{manifest['embeddings']} embeddings importés")
+
+    # Nettoyage des marqueurs temporaires
+    while True:
+        records, _, _ = driver.execute_query(
+            f"MATCH (n:{SNAPSHOT_LABEL}) WITH n LIMIT $batch_size "
+            f"REMOVE n:{SNAPSHOT_LABEL}, n.{SNAPSHOT_ID} RETURN count(n) AS count",
+            batch_size=batch_size,
+        )
+        if records[0]["count"] == 0:
+            break
+    driver.execute_query("DROP INDEX snapshot_id IF EXISTS")
+
+    if "indexes" in manifest:
+        records, _, _ = driver.execute_query("SHOW INDEXES YIELD name RETURN name")
+        existing = {record["name"] for record in records}
+        records, _, _ = driver.execute_query("SHOW CONSTRAINTS YIELD name RETURN name")
+        existing |= {record["name"] for record in records}
+        for schema in manifest["constraints"] + manifest["indexes"]:
+            if schema["name"] not in existing:
+                driver.execute_query(schema["statement"])
+                print(f"{schema['type']} {schema['name']} recréé")
+        driver.execute_query("CALL db.awaitIndexes()")
+    elif manifest["dimensions"]:
+        # Snapshot antérieur à la liste des index : seul l'index vectoriel commun est connu
+        create_vector_index(
+            driver,
+            manifest["index_name"],
+            label="Chunk",
+            embedding_property=manifest["embedding_property"],
+            dimensions=manifest["dimensions"],
+            similarity_fn="cosine",
+        )
+    print(f"Snapshot {folder} importé en {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    import neo4j
+    from dotenv import load_dotenv
+
+    parser = argparse.ArgumentParser(description="Export / import d'un snapshot du graphe")
+    parser.add_argument("command", choices=["export", "import"])
+    parser.add_argument("folder")
+    parser.add_argument("--batch-size", type=int, default=PAGE_SIZE)
+    parser.add_argument("--index-name", default=INDEX_NAME)
+    args = parser.parse_args()
+
+    load_dotenv()
+    neo4j_driver = neo4j.GraphDatabase.driver(
+        os.getenv("NEO4J_URI"),
+        auth=(os.getenv("NEO4J_USERNAME"), os.getenv("NEO4J_PASSWORD"))
+    )
+    try:
+        if args.command == "export":
+            export_graph(neo4j_driver, args.folder, page_size=args.batch_size, index_name=args.index_name)
+        else:
+            import_graph(neo4j_driver, args.folder, batch_size=args.batch_size)
+    finally:
+        neo4j_driver.close()
@@ -0,0 +1,290 @@
+"""Point d'entrée unique de l'ingestion : une source (adaptateur) + un profil de schéma -> graphe Neo4j.
+
+    python ingest.py csv data/Interventions_Presses_Fette.csv
+    python ingest.py jsonl data/Phee_dataset.json --profile phee_v2 --limit 1249
+    python ingest.py pdf pdfs --concurrency 2
+    python ingest.py csv data/Interventions_Presses_Fette.csv --tenant fette
+    python ingest.py pdf pdfs --profiling       # temps CPU / attente par étape + flame graph
+"""
+import os, asyncio, argparse, importlib, traceback
+from functools import lru_cache
+
+# Registres chargés à la demande : "module:attribut" pour les adaptateurs, module pour les profils
+SOURCE_ADAPTERS = {
+    "csv": "source_adapters:read_csv_interventions",
+    "jsonl": "source_adapters:read_jsonl",
+    "pdf": "source_adapters:read_pdf_folder",
+}
+
+PROFILES = {
+    "maintenance": "profiles.maintenance",
+    "alzheimer": "profiles.alzheimer",
+    "phee": "profiles.phee",
+    "phee_v2": "profiles.phee_v2",
+}
+
+# Profil utilisé quand --profile n'est pas précisé
+DEFAULT_PROFILES = {
+    "csv": "maintenance",
+    "jsonl": "phee_v2",
+    "pdf": "alzheimer",
+}
+
+
+def register_source(name, target, default_profile=None):
+    """Ajoute un adaptateur de source ("module:fonction", générateur asynchrone de (identifiant, texte, métadonnées))"""
+    SOURCE_ADAPTERS[name] = target
+    if default_profile:
+        DEFAULT_PROFILES[name] = default_profile
+
+
+def register_profile(name, module):
+    """Ajoute un profil de schéma (module définissant nodes, relations, prompt_template et max_tokens)"""
+    PROFILES[name] = module
+
+
+def get_source(name):
+    module_name, attribute = SOURCE_ADAPTERS[name].split(":")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+def get_profile(name):
+    return importlib.import_module(PROFILES[name])
+
+
+# Ressources partagées, construites une seule fois et au premier usage
+@lru_cache(maxsize=None)
+def get_driver():
+    import neo4j
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    return neo4j.GraphDatabase.driver(
+        os.getenv("NEO4J_URI"),
+        auth=(os.getenv("NEO4J_USERNAME"), os.getenv("NEO4J_PASSWORD"))
+    )
+
+
+@lru_cache(maxsize=None)
+def get_llm():
+    from neo4j_graphrag.llm import OpenAILLM as LLM
+
+    return LLM(
+        model_name="gpt-4o-mini",
+        model_params={"response_format": {"type": "json_object"}, "temperature": 0}
+    )
+
+
+@lru_cache(maxsize=None)
+def get_embedder():
+    from neo4j_graphrag.embeddings.openai import OpenAIEmbeddings
+    from embedding_config import get_embedding_model
+
+    # Même modèle que le chatbot et l'index vectoriel (EMBEDDING_MODEL)
+    return OpenAIEmbeddings(model=get_embedding_model())
+
+
+@lru_cache(maxsize=None)
+def get_pipeline(profile_name, tenant_name=None):
+    """Pipeline d'extraction d'un profil ; retourne (pipeline, splitter, extracteur) pour exposer les statistiques
+    de découpage et de validation.
+
+    Avec un tenant, les noeuds reçoivent son label et sont écrits dans sa base ; la résolution d'entités
+    est alors faite une fois par run et limitée au tenant (voir run_ingestion). Sans tenant, la résolution
+    du pipeline ignore les entités des tenants, qui peuvent partager la même base.
+    """
+    from neo4j_graphrag.experimental.components.entity_relation_extractor import OnError
+    from neo4j_graphrag.experimental.pipeline.kg_builder import SimpleKGPipeline
+    from extraction_validation import ValidatingExtractor
+    from text_splitter import SemanticSplitter
+
+    profile = get_profile(profile_name)
+    text_splitter = SemanticSplitter.for_context(profile.prompt_template, max_tokens=profile.max_tokens)
+    tenant_options = {}
+    if tenant_name:
+        from tenants import get_tenant, TenantNeo4jWriter
+
+        tenant = get_tenant(tenant_name)
+        tenant_options = {
+            "kg_writer": TenantNeo4jWriter(
+                get_driver(), tenant.label, tenant.lexical_graph_config, neo4j_database=tenant.database
+            ),
+            # Chunks sous le label du tenant : ils ne sont indexés que dans l'index vectoriel du tenant
+            "lexical_graph_config": tenant.lexical_graph_config,
+            "perform_entity_resolution": False,
+            "neo4j_database": tenant.database,
+        }
+    kg_builder = SimpleKGPipeline(
+        llm=get_llm(),
+        driver=get_driver(),
+        text_splitter=text_splitter,
+        embedder=get_embedder(),
+        entities=profile.nodes,
+        relations=profile.relations,
+        prompt_template=profile.prompt_template,
+        # Les adaptateurs fournissent du texte, y compris pour les PDF lus page par page (le chemin et
+        # la page sont ajoutés aux chunks par chunk_metadata)
+        from_pdf=False,
+        **tenant_options
+    )
+    # SimpleKGPipeline ne permet pas de fournir l'extracteur : on remplace le composant par défaut,
+    # qui abandonne tout le graphe d'un chunk dont le JSON est invalide
+    extractor = ValidatingExtractor(llm=get_llm(), prompt_template=profile.prompt_template, on_error=OnError.IGNORE)
+    kg_builder.runner.pipeline.set_component("extractor", extractor)
+    if not tenant_name:
+        from neo4j_graphrag.experimental.components.resolver import SinglePropertyExactMatchResolver
+        from tenants import SHARED_ENTITIES_FILTER
+
+        # Le résolveur par défaut fusionnerait les entités de même nom de tous les tenants
+        kg_builder.runner.pipeline.set_component(
+            "resolver", SinglePropertyExactMatchResolver(get_driver(), filter_query=SHARED_ENTITIES_FILTER)
+        )
+    return kg_builder, text_splitter, extractor
+
+
+def check_prompt(profile, text):
+    """Vérifie que le prompt du profil est correctement formaté"""
+    try:
+        formatted_prompt = profile.prompt_template.format(schema=profile.format_schema(), examples='', text=text)
+        print("Prompt formatting successful")
+        return formatted_prompt
+    except Exception as e:
+        print(f"Error formatting prompt: {e}")
+        return None
+
+
+def finish_tenant_run(tenant, dated=False):
+    """Après l'ingestion dans un tenant : résolution d'entités limitée au tenant, index vectoriel
+    (et index de dates) sur le label de ses chunks"""
+    from embedding_config import get_dimensions
+    from tenants import resolve_tenant_entities, create_tenant_index
+
+    print(f"{resolve_tenant_entities(get_driver(), tenant)} entités fusionnées dans le tenant {tenant.name}")
+    create_tenant_index(get_driver(), tenant, get_dimensions(get_embedder().model))
+    if dated:
+        from temporal import create_date_index
+
+        create_date_index(get_driver(), tenant.chunk_label, database=tenant.database)
+
+
+async def run_ingestion(source, path, profile=None, concurrency=1, limit=None, check=False, tenant=None,
+                        profiling=None, **source_options):
+    """Lit `path` avec l'adaptateur `source` et envoie chaque enregistrement au pipeline du profil.
+
+    `profiling` (par défaut la variable INGEST_PROFILING=1) active le profilage par étape (voir stage_profiler.py).
+    """
+    from text_splitter import chunk_metadata, document_chunk_index
+    from usage_tracking import UsageTracker, version_of
+
+    tenant_config = None
+    if tenant:
+        from tenants import get_tenant
+        tenant_config = get_tenant(tenant)
+        profile = profile or tenant_config.profile
+    profile_name = profile or DEFAULT_PROFILES[source]
+    schema = get_profile(profile_name)
+    kg_builder, text_splitter, extractor = get_pipeline(profile_name, tenant)
+
+    usage_tracker = UsageTracker(
+        f"ingest:{source}:{profile_name}",
+        schema_version=version_of([schema.nodes, schema.relations]),
+        prompt_version=version_of(schema.prompt_template),
+    )
+    usage_tracker.wrap_llm(get_llm())
+    usage_tracker.wrap_embedder(get_embedder())
+
+    if profiling is None:
+        profiling = os.getenv("INGEST_PROFILING") == "1"
+    records = get_source(source)(path, limit=limit, **source_options)
+    profiler = None
+    if profiling:
+        from stage_profiler import StageProfiler
+
+        profiler = StageProfiler()
+        profiler.instrument_pipeline(kg_builder.runner.pipeline)
+        records = profiler.iterate(f"source:{source}", records)
+        profiler.start()
+
+    print(f"Processing {source} source: {path} (profile {profile_name})")
+    semaphore = asyncio.Semaphore(concurrency)
+    errors = 0
+    dated = False
+
+    async def process(record_id, text, metadata):
+        nonlocal errors
+        try:
+            with usage_tracker.record(record_id), chunk_metadata(metadata):
+                result = await kg_builder.run_async(text=text)
+            print(f"{record_id} - Result: {result.result}")
+        except Exception as e:
+            errors += 1
+            print(f"Error during pipeline processing of {record_id}: {str(e)}")
+            print(traceback.format_exc())
+        finally:
+            semaphore.release()
+
+    # Les chunks d'un PDF envoyé page par page sont numérotés à la suite dans tout le document
+    with document_chunk_index():
+        tasks = set()
+        async for record_id, text, metadata in records:
+            dated = dated or bool(metadata and "date" in metadata)
+            if check:
+                check = False
+                test_prompt = check_prompt(schema, text)
+                if test_prompt:
+                    print("Sample formatted prompt (first 500 chars):")
+                    print(test_prompt[:500])
+            # Au plus `concurrency` enregistrements en cours : la lecture de la source attend une place libre
+            await semaphore.acquire()
+            task = asyncio.create_task(process(record_id, text, metadata))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        await asyncio.gather(*tasks)
+    if profiler:
+        profiler.stop()
+
+    if tenant_config:
+        finish_tenant_run(tenant_config, dated)
+    elif dated:
+        from temporal import create_date_index
+
+        # Index de plage utilisé par le filtre de fenêtre de temps du retriever
+        create_date_index(get_driver(), "Chunk")
+
+    print(f"Découpage : {text_splitter.stats.report()}")
+    print(f"Validation : {extractor.stats.report()}")
+    print(f"Consommation : {usage_tracker.report()}")
+    print(f"{errors} erreurs")
+    usage_tracker.save()
+    if profiler:
+        print(f"Profil par étape :\n{profiler.report()}")
+        print(f"Flame graph : {profiler.save(f'{source}-{profile_name}')}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingestion d'une source dans le graphe Neo4j")
+    parser.add_argument("source", choices=sorted(SOURCE_ADAPTERS))
+    parser.add_argument("path")
+    parser.add_argument("--profile", choices=sorted(PROFILES))
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--limit", type=int)
+    parser.add_argument("--check-prompt", action="store_true")
+    parser.add_argument("--tenant", help="partition cible (voir tenants.py)")
+    parser.add_argument("--profiling", action="store_true", default=None,
+                        help="profilage par étape (temps CPU / attente, flame graph dans data/profiles)")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(run_ingestion(
+            args.source,
+            args.path,
+            profile=args.profile,
+            concurrency=args.concurrency,
+            limit=args.limit,
+            check=args.check_prompt,
+            tenant=args.tenant,
+            profiling=args.profiling,
+        ))
+    finally:
+        if get_driver.cache_info().currsize:
+            get_driver().close()
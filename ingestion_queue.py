@@ -0,0 +1,354 @@
+import io, os, csv, json, time, sqlite3, asyncio, argparse, traceback
+from contextlib import contextmanager
+
+# Priorités : la plus petite valeur est traitée en premier
+PRIORITY_URGENT = 0    # rapports d'intervention / pannes
+PRIORITY_NORMAL = 5    # entrées JSONL
+PRIORITY_BACKLOG = 9   # manuels et publications PDF
+
+QUEUE_PATH = "data/ingestion_queue.db"
+MAX_ATTEMPTS = 3
+# Délai avant la nouvelle tentative d'un travail en échec (secondes), doublé à chaque tentative
+RETRY_DELAY = 30.0
+
+# Profil d'extraction de chaque type de travail (voir ingest.PROFILES)
+JOB_PROFILES = {
+    "csv": "maintenance",
+    "jsonl": "phee_v2",
+    "pdf": "alzheimer",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    priority INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    not_before REAL NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_pending ON jobs (status, priority, id);
+CREATE TABLE IF NOT EXISTS sources (
+    path TEXT PRIMARY KEY,
+    position INTEGER NOT NULL
+);
+"""
+
+
+class JobQueue:
+    """File de travaux persistante (SQLite) ordonnée par priorité puis par ancienneté"""
+
+    def __init__(self, path=QUEUE_PATH):
+        self.connection = sqlite3.connect(path, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+        # Files créées avant le délai entre tentatives
+        columns = {row[1] for row in self.connection.execute("PRAGMA table_info(jobs)")}
+        if "not_before" not in columns:
+            self.connection.execute("ALTER TABLE jobs ADD COLUMN not_before REAL NOT NULL DEFAULT 0")
+
+    @contextmanager
+    def transaction(self):
+        """Regroupe les écritures du bloc : un arrêt en cours de scan n'enregistre ni travaux ni position"""
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        self.connection.execute("COMMIT")
+
+    def enqueue(self, kind, payload, priority=PRIORITY_NORMAL):
+        now = time.time()
+        cursor = self.connection.execute(
+            "INSERT INTO jobs (priority, kind, payload, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (priority, kind, json.dumps(payload, ensure_ascii=False), now, now),
+        )
+        return cursor.lastrowid
+
+    def claim(self):
+        """Réserve le prochain travail en attente dont le délai de nouvelle tentative est écoulé, ou None"""
+        now = time.time()
+        row = self.connection.execute(
+            """
+            UPDATE jobs SET status = 'running', attempts = attempts + 1, updated_at = ?
+            WHERE id = (
+                SELECT id FROM jobs WHERE status = 'pending' AND not_before <= ? ORDER BY priority, id LIMIT 1
+            )
+            RETURNING id, kind, payload, attempts
+            """,
+            (now, now),
+        ).fetchone()
+        if row is None:
+            return None
+        job_id, kind, payload, attempts = row
+        return {"id": job_id, "kind": kind, "payload": json.loads(payload), "attempts": attempts}
+
+    def complete(self, job_id):
+        self.connection.execute(
+            "UPDATE jobs SET status = 'done', error = NULL, updated_at = ? WHERE id = ?", (time.time(), job_id)
+        )
+
+    def checkpoint(self, job_id, payload):
+        """Enregistre l'avancement d'un travail dans sa charge utile, pour qu'une reprise ne refasse pas le travail fait"""
+        self.connection.execute(
+            "UPDATE jobs SET payload = ?, updated_at = ? WHERE id = ?",
+            (json.dumps(payload, ensure_ascii=False), time.time(), job_id),
+        )
+
+    def fail(self, job, error):
+        """Remet le travail en attente pour une tentative différée (RETRY_DELAY, doublé à chaque échec),
+        ou le marque en échec après MAX_ATTEMPTS tentatives"""
+        status = "failed" if job["attempts"] >= MAX_ATTEMPTS else "pending"
+        now = time.time()
+        self.connection.execute(
+            "UPDATE jobs SET status = ?, error = ?, not_before = ?, updated_at = ? WHERE id = ?",
+            (status, error, now + RETRY_DELAY * 2 ** (job["attempts"] - 1), now, job["id"]),
+        )
+
+    def recover(self):
+        """Remet en attente les travaux interrompus par un arrêt du service"""
+        return self.connection.execute("UPDATE jobs SET status = 'pending' WHERE status = 'running'").rowcount
+
+    def counts(self):
+        return dict(self.connection.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+    def get_position(self, path):
+        """Position déjà lue dans une source, ou None si elle n'a jamais été vue"""
+        row = self.connection.execute("SELECT position FROM sources WHERE path = ?", (path,)).fetchone()
+        return row[0] if row else None
+
+    def set_position(self, path, position):
+        self.connection.execute(
+            "INSERT INTO sources (path, position) VALUES (?, ?) "
+            "ON CONFLICT(path) DO UPDATE SET position = excluded.position",
+            (path, position),
+        )
+
+
+def scan_sources(queue, csv_paths=(), jsonl_paths=(), pdfs_folder=None, tenants=None):
+    """Ajoute à la file les nouvelles lignes CSV/JSONL et les nouveaux PDF depuis le dernier passage.
+
+    `tenants` associe un type de source à un tenant (ex. {"csv": "fette"}, voir tenants.py).
+    """
+    tenants = tenants or {}
+    enqueued = 0
+    with queue.transaction():
+        for path in csv_paths:
+            if not os.path.exists(path):
+                continue
+            position = queue.get_position(path)
+            # L'historique présent au premier passage est chargé en tâche de fond, les nouvelles pannes en urgence
+            priority = PRIORITY_BACKLOG if position is None else PRIORITY_URGENT
+            position = position or 0
+            with open(path, newline="", encoding="utf-8") as f:
+                content = f.read()
+            # Comme pour le JSONL, seules les lignes complètes sont lues : une ligne en cours d'écriture
+            # (sans fin de ligne, ou avec un champ entre guillemets non refermé) sera reprise au passage suivant
+            complete = content[:content.rfind("\n") + 1]
+            rows = list(csv.DictReader(io.StringIO(complete)))
+            if complete.count('"') % 2:
+                rows = rows[:-1]
+            for index in range(position, len(rows)):
+                queue.enqueue("csv", {"path": path, "index": index, "row": rows[index], "tenant": tenants.get("csv")}, priority)
+                enqueued += 1
+            queue.set_position(path, max(position, len(rows)))
+
+        for path in jsonl_paths:
+            if not os.path.exists(path):
+                continue
+            position = queue.get_position(path) or 0
+            with open(path, "r", encoding="utf-8") as f:
+                f.seek(position)
+                # On ne lit que les lignes complètes : une ligne en cours d'écriture sera reprise au passage suivant
+                while True:
+                    line = f.readline()
+                    if not line.endswith("\n"):
+                        break
+                    position = f.tell()
+                    if line.strip():
+                        queue.enqueue("jsonl", {"path": path, "line": line, "tenant": tenants.get("jsonl")}, PRIORITY_NORMAL)
+                        enqueued += 1
+            queue.set_position(path, position)
+
+        if pdfs_folder and os.path.isdir(pdfs_folder):
+            for file in sorted(os.listdir(pdfs_folder)):
+                path = os.path.join(pdfs_folder, file)
+                if file.endswith(".pdf") and not queue.get_position(path):
+                    queue.enqueue("pdf", {"path": path, "tenant": tenants.get("pdf")}, PRIORITY_BACKLOG)
+                    queue.set_position(path, 1)
+                    enqueued += 1
+    return enqueued
+
+
+# Les pipelines (et les clients Neo4j / OpenAI partagés) sont construits par ingest.py au premier travail
+async def handle_csv(payload, checkpoint=None):
+    from ingest import get_pipeline
+    from source_adapters import format_intervention, intervention_metadata
+    from text_splitter import chunk_metadata
+    row = payload["row"]
+    full_text = format_intervention(
+        payload["index"], row["Date"], row["Technicien"], row["Rapport d'Intervention"],
+        row.get("Pièce Remplacée") or "None",
+    )
+    kg_builder, _, _ = get_pipeline(JOB_PROFILES["csv"], payload.get("tenant"))
+    with chunk_metadata(intervention_metadata(row["Date"])):
+        return await kg_builder.run_async(text=full_text)
+
+
+async def handle_jsonl(payload, checkpoint=None):
+    from ingest import get_pipeline
+    from source_adapters import format_phee_entry
+    kg_builder, _, _ = get_pipeline(JOB_PROFILES["jsonl"], payload.get("tenant"))
+    return await kg_builder.run_async(text=format_phee_entry(json.loads(payload["line"])))
+
+
+async def handle_pdf(payload, checkpoint=None):
+    """Ingère un PDF page par page ; après chaque page, `checkpoint` enregistre l'avancement pour
+    qu'une nouvelle tentative reprenne après la dernière page écrite au lieu de la réécrire"""
+    from ingest import get_pipeline
+    from pdf_streaming import stream_pdf_pages
+    from source_adapters import pdf_page_metadata
+    from text_splitter import chunk_metadata, document_chunk_index
+    path = payload["path"]
+    kg_builder, _, _ = get_pipeline(JOB_PROFILES["pdf"], payload.get("tenant"))
+    done_parts = payload.get("done_parts", 0)
+    result = None
+    with document_chunk_index({path: payload.get("next_chunk_index", 0)}) as next_index:
+        # Numérotation des morceaux transmis (une page, ou la fin reportée de la dernière page)
+        part = 0
+        async for page_number, page_text in stream_pdf_pages(path):
+            part += 1
+            if part <= done_parts:
+                continue
+            with chunk_metadata(pdf_page_metadata(path, page_number)):
+                result = await kg_builder.run_async(text=page_text)
+            if checkpoint is not None:
+                checkpoint(dict(payload, done_parts=part, next_chunk_index=next_index.get(path, 0)))
+    return result
+
+
+HANDLERS = {
+    "csv": handle_csv,
+    "jsonl": handle_jsonl,
+    "pdf": handle_pdf,
+}
+
+
+def job_usage_tracker(job):
+    """Tracker de consommation d'un travail, enregistré dans le rapport commun (voir usage_tracking.py)"""
+    from ingest import get_embedder, get_llm, get_profile
+    from usage_tracking import UsageTracker, version_of
+
+    profile_name = JOB_PROFILES[job["kind"]]
+    schema = get_profile(profile_name)
+    usage_tracker = UsageTracker(
+        f"queue:{job['kind']}:{profile_name}",
+        schema_version=version_of([schema.nodes, schema.relations]),
+        prompt_version=version_of(schema.prompt_template),
+    )
+    usage_tracker.wrap_llm(get_llm())
+    usage_tracker.wrap_embedder(get_embedder())
+    return usage_tracker
+
+
+async def worker(name, queue, stop, poll_interval=1.0, touched_tenants=None):
+    """Vide la file en continu ; attend `poll_interval` secondes quand elle est vide.
+
+    Les tenants qui ont reçu des données sont ajoutés à `touched_tenants` (nom -> données datées).
+    """
+    while not stop.is_set():
+        job = queue.claim()
+        if job is None:
+            await asyncio.sleep(poll_interval)
+            continue
+        start = time.perf_counter()
+        usage_tracker = None
+        try:
+            usage_tracker = job_usage_tracker(job)
+            # Appels LLM et embedding comptés par travail et par source
+            with usage_tracker.record(f"job-{job['id']}:{job['payload']['path']}"):
+                await HANDLERS[job["kind"]](
+                    job["payload"], checkpoint=lambda payload: queue.checkpoint(job["id"], payload)
+                )
+            queue.complete(job["id"])
+            tenant = job["payload"].get("tenant")
+            if tenant and touched_tenants is not None:
+                touched_tenants[tenant] = touched_tenants.get(tenant, False) or job["kind"] == "csv"
+            print(f"[{name}] job {job['id']} ({job['kind']}) done in {time.perf_counter() - start:.1f}s")
+        except Exception as e:
+            queue.fail(job, traceback.format_exc())
+            print(f"[{name}] job {job['id']} ({job['kind']}) failed (attempt {job['attempts']}): {e}")
+        finally:
+            # Une tentative en échec a aussi consommé des tokens
+            if usage_tracker is not None:
+                usage_tracker.save()
+
+
+async def serve(queue, workers=4, scan_interval=2.0, csv_paths=(), jsonl_paths=(), pdfs_folder=None, tenants=None):
+    """Service d'ingestion : surveille les sources et fait tourner `workers` travailleurs concurrents"""
+    recovered = queue.recover()
+    if recovered:
+        print(f"{recovered} travaux interrompus remis en attente")
+    stop = asyncio.Event()
+    touched_tenants = {}
+    tasks = [
+        asyncio.create_task(worker(f"worker-{i}", queue, stop, touched_tenants=touched_tenants))
+        for i in range(workers)
+    ]
+    try:
+        while True:
+            enqueued = scan_sources(queue, csv_paths, jsonl_paths, pdfs_folder, tenants)
+            if enqueued:
+                print(f"{enqueued} nouveaux travaux - file : {queue.counts()}")
+            counts = queue.counts()
+            if touched_tenants and not counts.get("pending") and not counts.get("running"):
+                # File vide : résolution d'entités et index des tenants alimentés, comme à la fin d'un run d'ingest.py
+                from ingest import finish_tenant_run
+                from tenants import get_tenant
+                for tenant, dated in list(touched_tenants.items()):
+                    del touched_tenants[tenant]
+                    finish_tenant_run(get_tenant(tenant), dated)
+            await asyncio.sleep(scan_interval)
+    finally:
+        stop.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Service d'ingestion continue vers Neo4j")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    serve_parser = subparsers.add_parser("serve")
+    serve_parser.add_argument("--workers", type=int, default=4)
+    serve_parser.add_argument("--scan-interval", type=float, default=2.0)
+    serve_parser.add_argument("--csv", nargs="*", default=["data/Interventions_Presses_Fette.csv"])
+    serve_parser.add_argument("--jsonl", nargs="*", default=["data/Phee_dataset.json"])
+    serve_parser.add_argument("--pdfs", default="pdfs")
+    serve_parser.add_argument("--tenant", action="append", default=[], metavar="SOURCE=TENANT",
+                              help="écrit une source dans un tenant, ex. --tenant csv=fette (répétable)")
+    subparsers.add_parser("status")
+    parser.add_argument("--queue", default=QUEUE_PATH)
+    args = parser.parse_args()
+
+    job_queue = JobQueue(args.queue)
+    if args.command == "status":
+        print(job_queue.counts())
+    else:
+        source_tenants = dict(mapping.split("=", 1) for mapping in args.tenant)
+        if source_tenants:
+            from tenants import get_tenant
+            for tenant_name in source_tenants.values():
+                get_tenant(tenant_name)   # nom inconnu : erreur avant de démarrer le service
+        asyncio.run(serve(
+            job_queue,
+            workers=args.workers,
+            scan_interval=args.scan_interval,
+            csv_paths=args.csv,
+            jsonl_paths=args.jsonl,
+            pdfs_folder=args.pdfs,
+            tenants=source_tenants,
+        ))
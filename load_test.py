@@ -0,0 +1,311 @@
+"""Test de charge du chemin de requête du chatbot (app.query_graph) avec des backends simulés.
+
+Les questions sont rejouées selon un processus de Poisson à plusieurs débits (ou en rafale), contre le
+GraphRAG partagé de l'application dont le LLM, l'embedder et, par défaut, le driver Neo4j sont
+remplacés par des bouchons aux latences log-normales réalistes. Aucun appel OpenAI n'est fait : le
+RerankingRetriever (MMR, fenêtre de temps, budget de tokens) tourne sur les candidats simulés.
+
+    python load_test.py                                  # débits 1, 2, 5, 10, 20 questions/s
+    python load_test.py --burst 50                       # 50 techniciens en même temps
+    python load_test.py --mode loop --rates 1 5 10       # toutes les questions dans une seule boucle asyncio
+    python load_test.py --retriever neo4j                # vraie recherche vectorielle, LLM et embedder simulés
+
+--mode thread (défaut) reproduit Streamlit : chaque session exécute asyncio.run(query_graph(...)) dans
+son propre thread. La latence est mesurée depuis l'heure d'arrivée prévue, pas depuis le démarrage
+effectif de la requête, pour que l'attente derrière un appel bloquant soit comptée.
+
+Les résultats sont ajoutés à data/load_test.jsonl pour comparer les changements de concurrence entre commits.
+"""
+import os, math, json, time, random, asyncio, argparse, datetime
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import neo4j
+import numpy as np
+from neo4j_graphrag.embeddings.base import Embedder
+from neo4j_graphrag.generation import GraphRAG
+from neo4j_graphrag.llm import LLMInterface
+from neo4j_graphrag.llm.types import LLMResponse
+
+RESULTS_PATH = "data/load_test.jsonl"
+
+DEFAULT_QUESTIONS = [
+    "Quelles sont les principales causes des pannes des machines Fette ?",
+    "Quelles pièces ont été remplacées le plus souvent ?",
+    "Quelles interventions ont concerné des fuites d'huile ?",
+    "Quels problèmes d'éjection des comprimés ont été constatés le mois dernier ?",
+    "Quel technicien intervient le plus sur les vibrations de la tourelle ?",
+    "Quelles pannes du dernier trimestre ont nécessité un remplacement de joints ?",
+    "Comment a été résolue l'usure des poinçons ?",
+    "Quelles actions préventives éviteraient les coupures électriques ?",
+]
+
+
+class LatencyModel:
+    """Latence log-normale (secondes) définie par sa médiane et son 95e centile"""
+
+    def __init__(self, median, p95, rng):
+        self.median = median
+        self.sigma = math.log(p95 / median) / 1.645
+        self.rng = rng
+
+    def sample(self):
+        return self.rng.lognormvariate(math.log(self.median), self.sigma)
+
+
+class StubLLM(LLMInterface):
+    """LLM simulé : attend une latence tirée du modèle puis renvoie une réponse fixe"""
+
+    def __init__(self, latency):
+        super().__init__(model_name="stub-llm")
+        self.latency = latency
+
+    def invoke(self, input, message_history=None, system_instruction=None):
+        time.sleep(self.latency.sample())
+        return LLMResponse(content="Réponse simulée.")
+
+    async def ainvoke(self, input, message_history=None, system_instruction=None):
+        await asyncio.sleep(self.latency.sample())
+        return LLMResponse(content="Réponse simulée.")
+
+
+class StubEmbedder(Embedder):
+    """Embedder simulé : vecteur aléatoire normalisé de la dimension de l'index"""
+
+    def __init__(self, latency, dimensions):
+        self.latency = latency
+        self.dimensions = dimensions
+
+    def embed_query(self, text):
+        time.sleep(self.latency.sample())
+        vector = [self.latency.rng.gauss(0.0, 1.0) for _ in range(self.dimensions)]
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+
+class StubDriver(neo4j.Driver):
+    """Driver Neo4j simulé pour RerankingRetriever : corpus de chunks datés aux embeddings aléatoires.
+
+    Répond à la vérification de version, à la lecture de l'index et à la recherche vectorielle (similarité
+    exacte sur le corpus, restreinte à la fenêtre de dates de la question, embeddings renvoyés avec les
+    chunks), avec la latence d'une requête Neo4j.
+    """
+
+    def __init__(self, latency, dimensions, size=500):
+        # Pas de connexion : neo4j.Driver.__init__ n'est pas appelé
+        self._pool = SimpleNamespace(pool_config=SimpleNamespace(user_agent=None))
+        self._closed = False
+        self.latency = latency
+        self.dimensions = dimensions
+        rng = np.random.default_rng(latency.rng.randrange(2 ** 32))
+        vectors = rng.standard_normal((size, dimensions)).astype(np.float32)
+        self.vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        today = datetime.date.today()
+        self.nodes = [
+            {
+                # Longueurs variables : le budget de tokens écarte une partie des chunks retenus par MMR
+                "text": " ".join(f"Intervention simulée {i}, constat et action {j}." for j in range(1 + i % 12)),
+                "date": neo4j.time.Date.from_native(today - datetime.timedelta(days=i % 365)),
+            }
+            for i in range(size)
+        ]
+
+    def execute_query(self, query, parameters_=None, routing_=None, database_=None, **kwargs):
+        parameters = dict(parameters_ or {}, **kwargs)
+        if "dbms.components" in query:
+            records = [neo4j.Record({"name": "Neo4j Kernel", "versions": ["5.26.0"], "edition": "enterprise"})]
+        elif "SHOW VECTOR INDEXES" in query:
+            records = [neo4j.Record({"labels": ["Chunk"], "properties": ["embedding"], "dimensions": self.dimensions})]
+        elif "AS dated" in query:
+            records = [neo4j.Record({"dated": True})]
+        else:
+            # Recherche vectorielle : les top_k chunks les plus proches de la question
+            time.sleep(self.latency.sample())
+            scores = self.vectors @ np.array(parameters["query_vector"], dtype=np.float32)
+            if "<= node.date <=" in query:
+                # Filtre de fenêtre de temps ($between) : chunks hors période écartés
+                start, end = (neo4j.time.Date.from_native(parameters[p]) for p in ("param_0", "param_1"))
+                scores = np.where([start <= node["date"] <= end for node in self.nodes], scores, -np.inf)
+            best = [i for i in np.argsort(-scores)[:parameters["top_k"]] if scores[i] > -np.inf]
+            records = [
+                neo4j.Record({"node": dict(self.nodes[i], embedding=self.vectors[i].tolist()), "nodeLabels": ["Chunk"],
+                              "elementId": str(i), "id": str(i), "score": float(scores[i])})
+                for i in best
+            ]
+        return neo4j.EagerResult(records, None, list(records[0].keys()) if records else [])
+
+    def close(self):
+        self._closed = True
+
+
+def build_stub_rag(retriever="stub", seed=0, llm_latency=(1.8, 4.5), embedding_latency=(0.15, 0.4),
+                   search_latency=(0.03, 0.12)):
+    """GraphRAG de l'application avec LLM et embedder simulés.
+
+    Le RerankingRetriever de l'application (MMR, fenêtre de temps, relecture des embeddings, budget de
+    tokens) est toujours utilisé : seul son driver est simulé, sauf avec retriever="neo4j".
+    """
+    from app import INDEX_NAME
+    from embedding_config import get_dimensions
+    from reranking import RerankingRetriever
+
+    rng = random.Random(seed)
+    dimensions = get_dimensions()
+    embedder = StubEmbedder(LatencyModel(*embedding_latency, rng), dimensions)
+    if retriever == "neo4j":
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        driver = neo4j.GraphDatabase.driver(
+            os.getenv("NEO4J_URI"),
+            auth=(os.getenv("NEO4J_USERNAME"), os.getenv("NEO4J_PASSWORD"))
+        )
+    else:
+        driver = StubDriver(LatencyModel(*search_latency, rng), dimensions)
+    search = RerankingRetriever(driver=driver, index_name=INDEX_NAME, embedder=embedder, fetch_k=20,
+                                token_budget=1500, date_property="date")
+    return GraphRAG(retriever=search, llm=StubLLM(LatencyModel(*llm_latency, rng)))
+
+
+def arrival_times(rate, duration, rng, burst=None):
+    """Instants d'arrivée (s) : processus de Poisson de débit `rate`, ou `burst` questions simultanées"""
+    if burst:
+        return [0.0] * burst
+    times, t = [], rng.expovariate(rate)
+    while t < duration:
+        times.append(t)
+        t += rng.expovariate(rate)
+    return times
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(math.ceil(p * len(ordered)) - 1, 0)]
+
+
+async def run_load(query, rag, questions, arrivals, mode="thread", max_threads=64):
+    """Lance une requête par arrivée et mesure sa latence depuis son heure d'arrivée prévue"""
+    latencies, errors = [], 0   # latencies : (arrivée prévue, latence)
+    in_flight = max_in_flight = 0
+    executor = ThreadPoolExecutor(max_workers=max_threads) if mode == "thread" else None
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+
+    async def one(index, scheduled):
+        nonlocal errors, in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        question = questions[index % len(questions)]
+        try:
+            if executor is not None:
+                # Comme une session Streamlit : asyncio.run dans le thread de la session
+                answer = await loop.run_in_executor(executor, lambda: asyncio.run(query(question, rag=rag)))
+            else:
+                answer = await query(question, rag=rag)
+            if str(answer).startswith("Erreur"):
+                errors += 1
+            else:
+                latencies.append((scheduled, time.perf_counter() - start - scheduled))
+        finally:
+            in_flight -= 1
+
+    tasks = []
+    for index, scheduled in enumerate(arrivals):
+        delay = start + scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(one(index, scheduled)))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    if executor is not None:
+        executor.shutdown()
+
+    # File qui s'allonge : les dernières arrivées attendent nettement plus que les premières
+    ordered = [latency for _, latency in sorted(latencies)]
+    quarter = len(ordered) // 4
+    growth = percentile(ordered[-quarter:], 0.5) / percentile(ordered[:quarter], 0.5) if quarter else None
+    values = [latency for _, latency in latencies]
+    return {
+        "requests": len(arrivals),
+        "completed": len(values),
+        "errors": errors,
+        "duration": elapsed,
+        "throughput": len(values) / elapsed if elapsed else 0.0,
+        "p50": percentile(values, 0.50),
+        "p95": percentile(values, 0.95),
+        "p99": percentile(values, 0.99),
+        "max": max(values, default=None),
+        "latency_growth": growth,
+        "max_in_flight": max_in_flight,
+    }
+
+
+def is_saturated(result, slo, max_growth=2.0):
+    """Saturation : p99 au-delà de l'objectif de latence, ou file d'attente qui grossit pendant le palier"""
+    if result["p99"] is None:
+        return True
+    growing = max_growth is not None and (result["latency_growth"] or 0.0) > max_growth
+    return result["p99"] > slo or growing
+
+
+def format_row(label, result, saturated):
+    def seconds(value):
+        return f"{value:>8.2f}" if value is not None else f"{'-':>8}"
+    return (
+        f"{label:<10}{result['requests']:>8}{result['completed']:>8}{result['errors']:>7}{result['throughput']:>9.2f}"
+        f"{seconds(result['p50'])}{seconds(result['p95'])}{seconds(result['p99'])}{seconds(result['max'])}"
+        f"{result['max_in_flight']:>8}  {'SATURÉ' if saturated else ''}"
+    )
+
+
+if __name__ == "__main__":
+    from startup_benchmark import git_revision
+
+    parser = argparse.ArgumentParser(description="Test de charge de app.query_graph avec backends simulés")
+    parser.add_argument("--questions", help="fichier de questions (une par ligne, ou JSONL avec un champ question)")
+    parser.add_argument("--rates", type=float, nargs="+", default=[1, 2, 5, 10, 20], help="débits offerts (questions/s)")
+    parser.add_argument("--duration", type=float, default=20, help="durée de chaque palier (s)")
+    parser.add_argument("--burst", type=int, help="envoie N questions simultanées au lieu des paliers de débit")
+    parser.add_argument("--mode", choices=["thread", "loop"], default="thread")
+    parser.add_argument("--max-threads", type=int, default=64, help="threads de sessions (mode thread)")
+    parser.add_argument("--retriever", choices=["stub", "neo4j"], default="stub")
+    parser.add_argument("--slo", type=float, default=10.0, help="objectif de latence p99 (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    from app import query_graph
+
+    questions = DEFAULT_QUESTIONS
+    if args.questions:
+        with open(args.questions, encoding="utf-8") as f:
+            lines = [line.strip() for line in f if line.strip()]
+        questions = [json.loads(line)["question"] if line.startswith("{") else line for line in lines]
+
+    rag = build_stub_rag(args.retriever, seed=args.seed)
+    rng = random.Random(args.seed)
+    steps = [(f"rafale {args.burst}", None)] if args.burst else [(f"{rate:g}/s", rate) for rate in args.rates]
+
+    print(f"{'palier':<10}{'req.':>8}{'ok':>8}{'err.':>7}{'débit/s':>9}{'p50 s':>8}{'p95 s':>8}{'p99 s':>8}"
+          f"{'max s':>8}{'simult.':>8}")
+    results, saturation_point = [], None
+    for label, rate in steps:
+        arrivals = arrival_times(rate, args.duration, rng, burst=args.burst)
+        result = asyncio.run(run_load(query_graph, rag, questions, arrivals, args.mode, args.max_threads))
+        # En rafale toutes les questions arrivent ensemble : seule la latence compte
+        saturated = is_saturated(result, args.slo, max_growth=None if args.burst else 2.0)
+        if saturated and saturation_point is None:
+            saturation_point = label
+        print(format_row(label, result, saturated))
+        results.append(dict(result, step=label, rate=rate, saturated=saturated))
+
+    print(f"Point de saturation : {saturation_point or 'non atteint'} (mode {args.mode}, p99 < {args.slo:g}s)")
+    with open(RESULTS_PATH, "a", encoding="utf-8") as f:
+        f.write(json.dumps({
+            "timestamp": time.time(),
+            "revision": git_revision(),
+            "mode": args.mode,
+            "retriever": args.retriever,
+            "results": results,
+        }) + "\n")
@@ -0,0 +1,78 @@
+import re, asyncio, threading
+
+import pypdf
+from neo4j_graphrag.exceptions import PdfLoaderError
+
+# Fin de phrase ou de paragraphe
+BOUNDARY_PATTERN = re.compile(r"[.!?]\s|\n\s*\n")
+# Au-delà, un texte sans ponctuation (tableau, scan) est transmis sans attendre de fin de phrase
+MAX_CARRY_CHARS = 20000
+
+
+def iter_pdf_pages(file_path):
+    """Extrait le texte d'un PDF page par page, sans jamais charger le document entier en mémoire"""
+    try:
+        with open(file_path, "rb") as fp:
+            reader = pypdf.PdfReader(fp)
+            for page_number in range(len(reader.pages)):
+                yield page_number + 1, reader.pages[page_number].extract_text() or ""
+    except Exception as e:
+        raise PdfLoaderError(e)
+
+
+def split_at_boundary(text):
+    """Sépare le texte complet (jusqu'à la dernière fin de phrase) du reste coupé par le saut de page"""
+    end = 0
+    for match in BOUNDARY_PATTERN.finditer(text):
+        end = match.end()
+    if end == 0 and len(text) > MAX_CARRY_CHARS:
+        end = len(text)
+    return text[:end], text[end:]
+
+
+async def stream_pdf_pages(file_path, max_pages_in_flight=4):
+    """Générateur asynchrone des pages d'un PDF, extraites dans un thread pendant que l'appelant traite les précédentes.
+
+    Au plus `max_pages_in_flight` pages sont en attente en mémoire. La phrase coupée en bas de page
+    est reportée au début de la page suivante pour que le splitter travaille sur des phrases entières.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=max_pages_in_flight)
+    stop = threading.Event()
+
+    def produce():
+        def put(item):
+            asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+        try:
+            for item in iter_pdf_pages(file_path):
+                if stop.is_set():
+                    return
+                put(item)
+        except Exception as e:
+            put(e)
+        finally:
+            if not stop.is_set():
+                put(None)
+
+    producer = loop.run_in_executor(None, produce)
+    carry = ""
+    try:
+        while True:
+            item = await queue.get()
+            if item is None:
+                break
+            if isinstance(item, Exception):
+                raise item
+            page_number, text = item
+            complete, carry = split_at_boundary(carry + text + "\n")
+            if complete.strip():
+                yield page_number, complete
+        if carry.strip():
+            yield page_number, carry
+    finally:
+        # Arrêt anticipé : on libère le producteur s'il attend une place dans la file
+        stop.set()
+        while not producer.done():
+            while not queue.empty():
+                queue.get_nowait()
+            await asyncio.sleep(0.01)
@@ -0,0 +1 @@
+"""Profils de schéma (labels, relations, prompt d'extraction) utilisés par ingest.py"""
@@ -0,0 +1,124 @@
+"""Profil de schéma : publications médicales sur la maladie d'Alzheimer (PDF)"""
+
+basic_node_labels = ["Object", "Entity", "Group", "Person", "Organization", "Place"]
+academic_node_labels = ["ArticleOrPaper", "PublicationOrJournal"]
+# Mêmes labels que ceux listés dans le prompt, pour que la validation de l'extraction ne les rejette pas
+medical_node_labels = ["Anatomy", "BiologicalProcess", "Cell", "CellularComponent",
+                       "CellType", "Condition", "Disease", "Drug",
+                       "EffectOrPhenotype", "Exposure", "GeneOrProtein", "Molecule",
+                       "MolecularFunction", "Pathway", "Symptom"]
+nodes = basic_node_labels + academic_node_labels + medical_node_labels
+
+# define relationship types
+relations = ["ACTIVATES", "AFFECTS", "ASSESSES", "ASSOCIATED_WITH", "AUTHORED",
+    "BIOMARKER_FOR", "CAUSES", "CITES", "CONTRIBUTES_TO", "DESCRIBES", "EXPRESSES",
+    "HAS_REACTION", "HAS_SYMPTOM", "INCLUDES", "INTERACTS_WITH", "PRESCRIBED",
+    "PRODUCES", "RECEIVED", "RESULTS_IN", "TREATS", "USED_FOR"]
+
+prompt_template = '''
+You are a medical researcher whose task is to extract information from medical papers
+and structuring it in a property graph to inform further medical and research Q&A.
+
+You will be given medical texts about Alzheimer disease and you will:
+- extract the entities (nodes) and specify their type
+- extract the relationships between these nodes (the relationship direction goes from the start node to the end node)
+
+Assign a unique ID (string) to each node, and reuse it to define relationships.
+Do respect the source and target node types for relationship and
+the relationship direction.
+
+Use the following node labels and relationships:
+
+basic_node_labels = ["Object", "Entity", "Group", "Person", "Organization", "Place"]
+
+academic_node_labels = ["ArticleOrPaper", "PublicationOrJournal"]
+
+medical_node_labels = ["Anatomy", "BiologicalProcess", "Cell", "CellularComponent",
+                       "CellType", "Condition", "Disease", "Drug",
+                       "EffectOrPhenotype", "Exposure", "GeneOrProtein", "Molecule",
+                       "MolecularFunction", "Pathway"]
+
+
+relationship types = ["ACTIVATES", "AFFECTS", "ASSESSES", "ASSOCIATED_WITH", "AUTHORED",
+    "BIOMARKER_FOR", "CAUSES", "CITES", "CONTRIBUTES_TO", "DESCRIBES", "EXPRESSES",
+    "HAS_REACTION", "HAS_SYMPTOM", "INCLUDES", "INTERACTS_WITH", "PRESCRIBED",
+    "PRODUCES", "RECEIVED", "RESULTS_IN", "TREATS", "USED_FOR"]
+
+
+- Use only the information from the Input text below.  Do not add any additional information you may have.
+- If the input text is empty, return empty Json.
+- Make sure to create as many nodes and relationships as needed to offer rich medical context for further research.
+- An AI knowledge assistant must be able to read this graph and immediately understand the context to inform detailed research questions.
+- Multiple documents will be ingested from different sources and we are using this property graph to connect information,
+so make sure entity types are fairly general.
+
+Do not return any additional information other than the VALID JSON in it.
+
+IMPORTANT FORMAT RULES:
+1. Return ONLY valid JSON - no other text before or after
+2. All strings must use double quotes, not single quotes
+3. The response must contain both "nodes" and "relationships" arrays, even if empty
+4. IDs must be strings, not numbers (e.g., "0" not 0)
+5. Every node must have id, label, and properties with a name
+6. Every relationship must have type, start_node_id, end_node_id, and properties
+
+
+**Strictly return valid JSON output following this format:**
+
+{{
+  "nodes": [
+    {{
+      "id": "0",
+      "label": "EntityType",
+      "properties": {{
+        "name": "EntityName"
+      }}
+    }},
+    {{
+      "id": "1",
+      "label": "AnotherEntityType",
+      "properties": {{
+        "name": "AnotherEntityName"
+      }}
+    }}
+  ],
+  "relationships": [
+    {{
+      "type": "TYPE_OF_RELATIONSHIP",
+      "start_node_id": "0",
+      "end_node_id": "1",
+      "properties": {{
+        "details": "Description of the relationship"
+      }}
+    }}
+  ]
+}}
+
+Use only fhe following nodes and relationships (if provided):
+{schema}
+
+Assign a unique ID (string) to each node, and reuse it to define relationships.
+Do respect the source and target node types for relationship and
+the relationship direction.
+
+Do not return any additional information other than the JSON in it.
+
+Examples:
+{examples}
+
+
+Now, do your task. This is the Input text:
+
+{text}
+
+'''
+
+# Découpage par sections et phrases, dimensionné en tokens pour le contexte de gpt-4o-mini
+max_tokens = 800
+
+def format_schema():
+    return f"""Available node types:
+{', '.join(nodes)}
+
+Available relationship types:
+{', '.join(relations)}"""
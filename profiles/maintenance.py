@@ -0,0 +1,111 @@
+"""Profil de schéma : interventions de maintenance GMAO sur les presses Fette (en français)"""
+
+# Mise à jour des types de nœuds
+nodes = [
+    {"label": "Technicien", "description": "Le nom ou le visa d'un technicien", "properties": [{"name": "name", "type": "STRING"}]},
+    {"label": "Action", "description": "Une activité déployée par une personne ou un service pour résoudre une panne", "properties": [{"name": "name", "type": "STRING"}, {"name": "date", "type": "DATE"}]},
+    {"label": "Panne", "description": "Une panne ou un problème constaté sur une machine", "properties": [{"name": "name", "type": "STRING"}, {"name": "Durée", "type": "STRING"}, {"name": "Identifiant", "type": "STRING"}]},
+    {"label": "Machine", "description": "Un équipement de production", "properties": [{"name": "name", "type": "STRING"}]},
+    {"label": "Composant", "description": "Une pièce ou une partie d'une machine", "properties": [{"name": "name", "type": "STRING"}, {"name": "Référence", "type": "STRING"}]},
+    {"label": "Cause", "description": "La cause ou root-cause ayant provoquée une panne", "properties": [{"name": "name", "type": "STRING"}]},
+]
+
+# Mise à jour des relations
+relations = [
+    # Relations de base
+    "CONTIENT",
+    "PROVOQUE",
+    "REALISE",
+    "INTERVIENT_SUR",
+    "DIAGNOSTIQUE",
+    "AFFECTE",
+    "IMPLIQUE",    
+    "CONTRIBUE_A",
+    "DEGRADE"
+]
+
+prompt_template = '''
+Vous êtes un technicien de maintenance dont la tâche est d'extraire des informations à partir de documents techniques et 
+de rapports d'intervention de GMAO, puis de les structurer sous forme de graphe de propriétés afin de résoudre des problèmes.
+
+Vous recevrez des rapports techniques concernant des pannes de machines, des défaillances et leurs causes racines. Votre mission sera :
+- d'extraire les entités (nœuds) et de spécifier leur type,
+- d'extraire les relations entre ces nœuds (la direction de la relation va du nœud de départ au nœud d'arrivée),
+- d'inclure toutes les propriétés pertinentes pour chaque nœud en fonction du schéma fourni.
+
+Informations sur le schéma :
+{schema}
+
+- Utilisez uniquement les informations provenant du texte d'entrée ci-dessous. N'ajoutez aucune information supplémentaire que vous pourriez avoir.
+- Si le texte d'entrée est vide, retournez un JSON vide.
+- Assurez-vous de créer autant de nœuds et de relations que nécessaire pour offrir un contexte médical riche en vue de recherches approfondies.
+- Créez des nœuds avec toutes les propriétés disponibles du schéma lorsque l'information est présente dans le texte.
+- Un assistant de connaissance basé sur l'IA doit pouvoir lire ce graphe et comprendre immédiatement le contexte pour formuler des questions de recherche détaillées.
+- La propriété "name" est OBLIGATOIRE pour tous les nœuds. Si vous ne disposez pas de l'information exacte, utilisez une terminologie générique.
+
+Ne retournez aucune autre information en dehors d'un JSON VALIDE.
+
+RÈGLES DE FORMAT IMPORTANTES :
+1. Retournez UNIQUEMENT un JSON valide - aucun autre texte avant ou après.
+2. Toutes les chaînes de caractères doivent utiliser des guillemets doubles, et non des guillemets simples.
+3. La réponse doit contenir à la fois les tableaux "nodes" et "relationships", même s'ils sont vides.
+4. Les identifiants (ID) doivent être des chaînes de caractères et non des nombres (ex. : "0" et non 0).
+5. Chaque nœud doit avoir un id, un label et toutes les propriétés définies dans le schéma (utilisez `null` si l'information n'est pas disponible).
+6. Les résultats doivent être en français.
+
+**Retournez strictement un JSON valide respectant ce format :**
+
+{{
+  "nodes": [
+    {{
+      "id": "0",
+      "label": "Cause",
+      "properties": {{
+        "name": "Coupure électrique"
+      }}
+    }},
+    {{
+      "id": "1",
+      "label": "Panne",
+      "properties": {{
+        "name":"disjonction du connecteur electrique",
+        "Identifiant": "Cas_1",
+        "Durée": "30 minutes"
+      }}
+    }}
+  ],
+  "relationships": [
+    {{
+      "type": "PROVOQUE",
+      "start_node_id": "0",
+      "end_node_id": "1",
+      "properties": {{
+        "details": "Coupure générale du réseau électrique"
+      }}
+    }}
+  ]
+}}
+
+{examples}
+
+Maintenant, réalise ta tâche en analysant le texte suivant :
+
+{text}
+'''
+
+# Une intervention tient dans un seul chunk : pas de découpage ni d'overlap
+max_tokens = 512
+
+def format_schema():
+    """Formate le schéma pour le prompt en incluant les descriptions et propriétés"""
+    node_descriptions = []
+    for node in nodes:
+        properties_str = ", ".join([f"{prop['name']} ({prop['type'].lower()})" for prop in node['properties']])
+        node_str = f"- {node['label']}: {node['description']}\n  Properties: {properties_str}"
+        node_descriptions.append(node_str)
+
+    return f"""Node Types:
+{chr(10).join(node_descriptions)}
+
+Relationship Types Available:
+{', '.join(relations)}"""
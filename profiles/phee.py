@@ -0,0 +1,116 @@
+"""Profil de schéma : effets indésirables PHEE, labels simples"""
+
+# Mise à jour des types de nœuds
+nodes = [
+    "Drug",
+    "Trigger",
+    "Patient",
+    "Condition",
+    "Gender",
+    "Age",
+    "Organization",
+    "Place",
+    "Disease",
+    "Symptom",
+    "Effect",
+    "Disorder",
+    "Treatment",
+    "Route"
+]
+
+# Mise à jour des relations
+relations = [
+    # Relations de base
+    "TRIGGERS",
+    "HAS_EFFECT",
+    "TREATS",
+    "ADMINISTERS",
+    "HAS_ATTRIBUTE",
+    "CAUSES",
+    
+    # Relations composées
+    "ADMINISTERED_TO",
+    "ADMINISTERED_VIA",
+    "COMBINED_WITH",
+    
+    # Relations générales existantes pertinentes
+    "AFFECTS",
+    "ASSOCIATED_WITH",
+    "CONTRIBUTES_TO",
+    "HAS_REACTION",
+    "INTERACTS_WITH",
+    "RESULTS_IN"
+]
+
+prompt_template = '''
+You are a medical researcher whose task is to extract information from medical papers
+and structuring it in a property graph to inform further medical and research Q&A.
+
+You will be given medical texts about adverse effects and you will:
+- extract the entities (nodes) and specify their type
+- extract the relationships between these nodes (the relationship direction goes from the start node to the end node)
+
+{schema}
+
+- Use only the information from the Input text below. Do not add any additional information you may have.
+- If the input text is empty, return empty Json.
+- Make sure to create as many nodes and relationships as needed to offer rich medical context for further research.
+- An AI knowledge assistant must be able to read this graph and immediately understand the context to inform detailed research questions.
+
+Do not return any additional information other than the VALID JSON in it.
+
+IMPORTANT FORMAT RULES:
+1. Return ONLY valid JSON - no other text before or after
+2. All strings must use double quotes, not single quotes
+3. The response must contain both "nodes" and "relationships" arrays, even if empty
+4. IDs must be strings, not numbers (e.g., "0" not 0)
+5. Every node must have id, label, and properties with a name
+6. Every relationship must have type, start_node_id, end_node_id, and properties
+
+**Strictly return valid JSON output following this format:**
+
+{{
+  "nodes": [
+    {{
+      "id": "0",
+      "label": "EntityType",
+      "properties": {{
+        "name": "EntityName"
+      }}
+    }},
+    {{
+      "id": "1",
+      "label": "AnotherEntityType",
+      "properties": {{
+        "name": "AnotherEntityName"
+      }}
+    }}
+  ],
+  "relationships": [
+    {{
+      "type": "TYPE_OF_RELATIONSHIP",
+      "start_node_id": "0",
+      "end_node_id": "1",
+      "properties": {{
+        "details": "Description of the relationship"
+      }}
+    }}
+  ]
+}}
+
+{examples}
+
+Now, do your task. This is the Input text:
+
+{text}
+'''
+
+# Un enregistrement PHEE tient dans un seul chunk : pas de découpage ni d'overlap
+max_tokens = 512
+
+def format_schema():
+    return f"""Available node types:
+{', '.join(nodes)}
+
+Available relationship types:
+{', '.join(relations)}"""
@@ -0,0 +1,123 @@
+"""Profil de schéma : effets indésirables PHEE, labels avec descriptions et propriétés"""
+
+# Mise à jour des types de nœuds
+nodes = [
+    {"label": "Drug", "description": "The name of a molecule, a drug or a treatment", "properties": [{"name": "name", "type": "STRING"}, {"name": "administration route", "type": "STRING"}, {"name": "dosage", "type": "STRING"}]},
+    {"label": "Patient", "description": "A patient or a person with a unique identifier", "properties": [{"name": "name", "type": "STRING"}, {"name": "gender", "type": "STRING"}, {"name": "condition", "type": "STRING"}, {"name": "age", "type": "INTEGER"}]},
+    {"label": "Disease", "description": "A disease or pathology", "properties": [{"name": "disease name", "type": "STRING"}]},
+    {"label": "Symptom", "description": "The disorders or injury caused by the disease", "properties": [{"name": "name", "type": "STRING"}]},
+    {"label": "Effect", "description": "The effect of the disease the disease", "properties": [{"name": "name", "type": "STRING"}]},
+    {"label": "Event", "description": "An event correlated with side effects", "properties": [{"name": "name", "type": "STRING"}]},
+]
+
+# Mise à jour des relations
+relations = [
+    # Relations de base
+    "TRIGGERS",
+    "HAS_EFFECT",
+    "TREATS",
+    "ADMINISTERS",
+    "HAS_ATTRIBUTE",
+    "CAUSES",
+    
+    # Relations composées
+    "ADMINISTERED_TO",
+    "ADMINISTERED_VIA",
+    "COMBINED_WITH",
+    
+    # Relations générales existantes pertinentes
+    "AFFECTS",
+    "ASSOCIATED_WITH",
+    "CONTRIBUTES_TO",
+    "HAS_REACTION",
+    "INTERACTS_WITH",
+    "RESULTS_IN"
+]
+
+prompt_template = '''
+You are a medical researcher whose task is to extract information from medical papers
+and structuring it in a property graph to inform further medical and research Q&A.
+
+You will be given medical texts about adverse effects and you will:
+- extract the entities (nodes) and specify their type
+- extract the relationships between these nodes (the relationship direction goes from the start node to the end node)
+- include all relevant properties for each node based on the schema provided
+
+Schema Information:
+{schema}
+
+- Use only the information from the Input text below. Do not add any additional information you may have.
+- If the input text is empty, return empty Json.
+- Make sure to create as many nodes and relationships as needed to offer rich medical context for further research.
+- Create nodes with all available properties from the schema when the information is present in the text.
+- An AI knowledge assistant must be able to read this graph and immediately understand the context to inform detailed research questions.
+- The name properties is MANDATORY for all nodes. If you don't have the accurate information, use a generic terminology.
+
+Do not return any additional information other than the VALID JSON in it.
+
+IMPORTANT FORMAT RULES:
+1. Return ONLY valid JSON - no other text before or after
+2. All strings must use double quotes, not single quotes
+3. The response must contain both "nodes" and "relationships" arrays, even if empty
+4. IDs must be strings, not numbers (e.g., "0" not 0)
+5. Every node must have id, label, and all the properties defined in the schema (use null if the information is not available)
+
+**Strictly return valid JSON output following this format:**
+
+{{
+  "nodes": [
+    {{
+      "id": "0",
+      "label": "Drug",
+      "properties": {{
+        "name": "DrugName",
+        "administration_route": "oral",
+        "dosage": "10mg"
+      }}
+    }},
+    {{
+      "id": "1",
+      "label": "Patient",
+      "properties": {{
+        "name":"8255797_2",
+        "gender": "female",
+        "condition": "stable",
+        "age": 45
+      }}
+    }}
+  ],
+  "relationships": [
+    {{
+      "type": "ADMINISTERED_TO",
+      "start_node_id": "0",
+      "end_node_id": "1",
+      "properties": {{
+        "details": "Description of the administration"
+      }}
+    }}
+  ]
+}}
+
+{examples}
+
+Now, do your task. This is the Input text:
+
+{text}
+'''
+
+# Un enregistrement PHEE tient dans un seul chunk : pas de découpage ni d'overlap
+max_tokens = 512
+
+def format_schema():
+    """Formate le schéma pour le prompt en incluant les descriptions et propriétés"""
+    node_descriptions = []
+    for node in nodes:
+        properties_str = ", ".join([f"{prop['name']} ({prop['type'].lower()})" for prop in node['properties']])
+        node_str = f"- {node['label']}: {node['description']}\n  Properties: {properties_str}"
+        node_descriptions.append(node_str)
+
+    return f"""Node Types:
+{chr(10).join(node_descriptions)}
+
+Relationship Types Available:
+{', '.join(relations)}"""
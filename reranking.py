@@ -0,0 +1,175 @@
+import numpy as np
+from neo4j_graphrag.retrievers import VectorRetriever
+from neo4j_graphrag.types import RawSearchResult, RetrieverResultItem
+
+from temporal import parse_time_window
+from text_splitter import get_token_counter
+
+# Au moins un chunk daté sous le label de l'index (index de plage sur la date)
+DATED_QUERY = """
+MATCH (c:{label}) WHERE c.{date_property} IS NOT NULL
+WITH c LIMIT 1
+RETURN count(c) > 0 AS dated
+"""
+
+
+def mmr(query_vector, candidate_vectors, k, lambda_mult=0.5):
+    """Maximal Marginal Relevance : choisit k candidats pertinents et différents les uns des autres.
+
+    Retourne les indices des candidats retenus, dans l'ordre de sélection.
+    """
+    if len(candidate_vectors) == 0:
+        return []
+    query = np.array(query_vector, dtype=np.float32)
+    candidates = np.array(candidate_vectors, dtype=np.float32)
+    query /= np.linalg.norm(query) or 1.0
+    candidates /= np.maximum(np.linalg.norm(candidates, axis=1, keepdims=True), 1e-12)
+
+    relevance = candidates @ query
+    similarity = candidates @ candidates.T
+    selected = [int(np.argmax(relevance))]
+    # Similarité maximale de chaque candidat avec ceux déjà retenus
+    redundancy = similarity[selected[0]].copy()
+    while len(selected) < min(k, len(candidates)):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[selected] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        redundancy = np.maximum(redundancy, similarity[best])
+    return selected
+
+
+class RerankingRetriever(VectorRetriever):
+    """VectorRetriever qui sur-échantillonne, diversifie par MMR, peut reranker avec un cross-encoder
+    local et limite le contexte renvoyé à un budget de tokens.
+
+    Les embeddings des candidats sont renvoyés par la recherche vectorielle elle-même : ni la question
+    ni les chunks ne sont réencodés, et le MMR ne coûte pas d'aller-retour supplémentaire vers Neo4j.
+    Avec `date_property`, une fenêtre de temps trouvée dans la question ("le mois dernier") restreint
+    les candidats aux chunks datés de cette période avant le calcul de similarité. Si aucun chunk
+    n'est daté de la période, le résultat est vide (métadonnée "time_window" renseignée) ; la fenêtre
+    n'est ignorée que si aucun chunk de l'index n'a de date (ex. corpus PDF).
+
+    Par défaut seuls le texte, la date et l'embedding des chunks sont relus et seul le texte est envoyé
+    au LLM : le budget de tokens porte sur le contenu réellement formaté par `result_formatter`.
+    """
+
+    def __init__(self, *args, fetch_k=20, lambda_mult=0.5, cross_encoder=None, token_budget=1500,
+                 text_property="text", date_property=None, **kwargs):
+        if not kwargs.get("return_properties"):
+            kwargs["return_properties"] = [text_property] + ([date_property] if date_property else [])
+        super().__init__(*args, **kwargs)
+        # Propriété d'embedding de l'index (connue après lecture de l'index), nécessaire au MMR
+        if self._embedding_node_property not in self.return_properties:
+            self.return_properties = self.return_properties + [self._embedding_node_property]
+        self.fetch_k = fetch_k
+        self.lambda_mult = lambda_mult
+        self.cross_encoder_name = cross_encoder
+        self._cross_encoder = None
+        self.token_budget = token_budget
+        self.text_property = text_property
+        self.date_property = date_property
+        self.count_tokens = get_token_counter()
+
+    def get_cross_encoder(self):
+        """Charge le cross-encoder au premier usage (sentence-transformers est optionnel)"""
+        if self._cross_encoder is None:
+            try:
+                from sentence_transformers import CrossEncoder
+            except ImportError:
+                raise ImportError(
+                    "Could not import sentence_transformers. Install it with `pip install sentence-transformers` "
+                    "or create the retriever with cross_encoder=None."
+                )
+            self._cross_encoder = CrossEncoder(self.cross_encoder_name, device="cpu")
+        return self._cross_encoder
+
+    def get_search_results(self, query_vector=None, query_text=None, top_k=5, effective_search_ratio=1, filters=None):
+        """Recherche vectorielle sur `fetch_k` candidats, puis MMR, reranking et budget de tokens"""
+        if query_vector is None and query_text and self.embedder:
+            query_vector = self.embedder.embed_query(query_text)
+
+        def search(search_filters):
+            return super(RerankingRetriever, self).get_search_results(
+                query_vector=query_vector,
+                query_text=None if query_vector is not None else query_text,
+                top_k=max(self.fetch_k, top_k),
+                effective_search_ratio=effective_search_ratio,
+                filters=search_filters,
+            ).records
+
+        time_window = parse_time_window(query_text) if self.date_property and query_text else None
+        if time_window:
+            # Avec un filtre, la recherche est exacte sur les seuls chunks de la fenêtre (index de plage sur la date)
+            window_filter = time_window.as_filter(self.date_property)
+            candidates = search({"$and": [filters, window_filter]} if filters else window_filter)
+            if not candidates and self.has_dated_chunks():
+                # Rien dans la période demandée : pas de chunks d'une autre période à la place
+                return RawSearchResult(records=[], metadata={
+                    "fetched": 0,
+                    "selected": 0,
+                    "context_tokens": 0,
+                    "time_window": [time_window.start.isoformat(), time_window.end.isoformat()],
+                })
+            if not candidates:
+                # Aucun chunk daté dans l'index (ex. corpus PDF) : la fenêtre ne peut pas s'appliquer
+                time_window = None
+        if not time_window:
+            candidates = search(filters)
+
+        # Diversification sur les embeddings renvoyés avec les candidats
+        candidates = [record for record in candidates if self._get_embedding(record) is not None]
+        selected = [
+            candidates[i] for i in mmr(
+                query_vector, [self._get_embedding(record) for record in candidates], top_k, self.lambda_mult
+            )
+        ]
+
+        if self.cross_encoder_name and query_text and selected:
+            scores = self.get_cross_encoder().predict(
+                [(query_text, self._get_text(record)) for record in selected]
+            )
+            selected = [record for _, record in sorted(zip(scores, selected), key=lambda p: -p[0])]
+
+        # Remplissage du contexte dans l'ordre de pertinence jusqu'au budget de tokens
+        packed, used_tokens = [], 0
+        formatter = self.get_result_formatter()
+        for record in selected:
+            n_tokens = self.count_tokens(str(formatter(record).content))
+            if packed and used_tokens + n_tokens > self.token_budget:
+                continue
+            packed.append(record)
+            used_tokens += n_tokens
+
+        return RawSearchResult(
+            records=packed,
+            metadata={
+                "fetched": len(candidates),
+                "selected": len(selected),
+                "context_tokens": used_tokens,
+                "time_window": [time_window.start.isoformat(), time_window.end.isoformat()] if time_window else None,
+            },
+        )
+
+    def has_dated_chunks(self):
+        """Vrai si au moins un chunk de l'index porte une date"""
+        records, _, _ = self.driver.execute_query(
+            DATED_QUERY.format(label=f"`{self._node_label}`", date_property=f"`{self.date_property}`"),
+            database_=self.neo4j_database,
+        )
+        return bool(records and records[0]["dated"])
+
+    def default_record_formatter(self, record):
+        """Contexte du LLM : le texte du chunk seul ; score et date en métadonnées"""
+        node = record.get("node") or {}
+        metadata = {"score": record.get("score"), "nodeLabels": record.get("nodeLabels"), "id": record.get("id")}
+        if self.date_property and node.get(self.date_property) is not None:
+            metadata[self.date_property] = str(node[self.date_property])
+        return RetrieverResultItem(content=self._get_text(record), metadata=metadata)
+
+    def _get_embedding(self, record):
+        return (record.get("node") or {}).get(self._embedding_node_property)
+
+    def _get_text(self, record):
+        node = record.get("node") or {}
+        return str(node.get(self.text_property) or node)
@@ -0,0 +1,83 @@
+"""Adaptateurs de sources : chacun lit une source et produit des enregistrements (identifiant, texte, métadonnées).
+
+Les métadonnées (ou None) sont copiées sur les chunks de l'enregistrement, ex. la date d'une intervention.
+
+Les dépendances lourdes (pandas, pypdf) ne sont importées que par l'adaptateur qui en a besoin.
+"""
+import os, json, datetime
+
+
+def format_intervention(counter, date, technicien, intervention, replace_piece):
+    """Construit le texte d'une intervention tel qu'il est envoyé au pipeline"""
+    failure_id = "Case_" + str(counter)
+    technicien = "Technician_" + technicien
+    return failure_id + " - " + date + " - " + technicien + " - " + intervention + " - " + replace_piece
+
+
+def intervention_metadata(date):
+    """Date typée de l'intervention, pour le filtrage par fenêtre de temps (voir temporal.py)"""
+    try:
+        return {"date": datetime.date.fromisoformat(str(date)[:10])}
+    except ValueError:
+        return None
+
+
+def pdf_page_metadata(path, page_number):
+    """Document et page d'origine d'un chunk PDF, pour retrouver la publication citée dans une réponse"""
+    return {"path": path, "page": page_number}
+
+
+def format_phee_entry(data, prefix_id=True):
+    """Construit le texte d'une entrée PHEE, préfixé par l'identifiant du patient"""
+    if prefix_id:
+        return "Patient_" + data['id'] + " " + data['context']
+    return data['context']
+
+
+async def read_csv_interventions(csv_file_path, limit=None):
+    """Rapports d'intervention GMAO (colonnes Date, Technicien, Rapport d'Intervention, Pièce Remplacée)"""
+    import pandas as pd
+
+    data = pd.read_csv(csv_file_path, nrows=limit)
+    for counter, row in data.iterrows():
+        # Une ligne mal formée (cellule vide...) est ignorée sans interrompre le run
+        try:
+            replace_piece = str(row['Pièce Remplacée']) if not pd.isna(row['Pièce Remplacée']) else "None"
+            text = format_intervention(
+                counter, row['Date'], row['Technicien'], row["Rapport d'Intervention"], replace_piece
+            )
+        except Exception as e:
+            print(f"Error processing entry {counter}: {e!r}")
+            continue
+        yield "Case_" + str(counter), text, intervention_metadata(row['Date'])
+
+
+async def read_jsonl(json_file_path, limit=None, prefix_id=True):
+    """Entrées JSONL du jeu de données PHEE (champs id et context)"""
+    with open(json_file_path, 'r', encoding='utf-8') as file:
+        for counter, line in enumerate(file):
+            if limit is not None and counter >= limit:
+                break
+            if not line.strip():  # Ignorer les lignes vides
+                continue
+            try:
+                data = json.loads(line)
+                record_id, text = data['id'], format_phee_entry(data, prefix_id)
+            except json.JSONDecodeError as e:
+                print(f"Error decoding input JSON line {counter + 1}: {e}")
+                continue
+            except Exception as e:
+                print(f"Error processing entry {counter + 1}: {e!r}")
+                continue
+            yield record_id, text, None
+
+
+async def read_pdf_folder(pdfs_folder, limit=None):
+    """PDF d'un dossier, lus page par page ; chaque chunk garde le chemin du PDF et sa page"""
+    from pdf_streaming import stream_pdf_pages
+
+    pdf_file_paths = sorted(os.path.join(pdfs_folder, file) for file in os.listdir(pdfs_folder) if file.endswith(".pdf"))
+    for path in pdf_file_paths[:limit]:
+        print(f"Processing : {path}")
+        async for page_number, page_text in stream_pdf_pages(path):
+            yield f"{path}#page={page_number}", page_text, pdf_page_metadata(path, page_number)
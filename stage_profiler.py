@@ -0,0 +1,262 @@
+"""Profilage par échantillonnage des étapes de l'ingestion (opt-in : ingest.py --profiling ou INGEST_PROFILING=1).
+
+Chaque composant du pipeline (splitter, embedder, extracteur, writer, résolution) et la lecture de la
+source forment une étape. Pour chacune on mesure le temps CPU réellement passé dans son code et le
+temps d'attente (réseau, await, appels bloquants) ; un thread échantillonne en parallèle les piles
+d'appels pour produire un flame graph par étape.
+
+Sorties dans data/profiles/<run>/ : stages.folded (format flamegraph.pl / speedscope),
+flamegraph.svg et summary.json.
+"""
+import os, sys, html, json, time, hashlib, threading, functools, contextvars
+from collections import Counter, defaultdict
+from dataclasses import dataclass, asdict
+
+PROFILES_DIR = "data/profiles"
+IDLE = "<attente>"
+
+# Profileur du run en cours ; propagé aux tâches asyncio créées après StageProfiler.start()
+_active_profiler = contextvars.ContextVar("stage_profiler", default=None)
+
+
+@dataclass
+class StageTimes:
+    calls: int = 0
+    wall: float = 0.0
+    cpu: float = 0.0
+
+    @property
+    def waiting(self):
+        return max(self.wall - self.cpu, 0.0)
+
+
+class _TimedAwaitable:
+    """Exécute une coroutine pas à pas en mesurant le temps CPU de chaque pas (entre deux await)"""
+
+    def __init__(self, profiler, stage, awaitable):
+        self.profiler = profiler
+        self.stage = stage
+        self.awaitable = awaitable
+
+    def __await__(self):
+        profiler, stage = self.profiler, self.stage
+        times = profiler.stages[stage]
+        times.calls += 1
+        start = time.perf_counter()
+        iterator = self.awaitable.__await__()
+        value, error = None, None
+        try:
+            while True:
+                previous, profiler.active_stage = profiler.active_stage, stage
+                cpu_start = time.thread_time()
+                try:
+                    if error is not None:
+                        yielded = iterator.throw(error)
+                    else:
+                        yielded = iterator.send(value)
+                except StopIteration as stop:
+                    return stop.value
+                finally:
+                    times.cpu += time.thread_time() - cpu_start
+                    profiler.active_stage = previous
+                value, error = None, None
+                try:
+                    value = yield yielded
+                except GeneratorExit:
+                    iterator.close()
+                    raise
+                except BaseException as e:  # annulation de la tâche, à transmettre à la coroutine
+                    error = e
+        finally:
+            times.wall += time.perf_counter() - start
+
+
+class StageProfiler:
+    """Temps CPU / attente par étape et échantillons de piles d'appels pour le flame graph.
+
+    Les temps sont cumulés sur tous les enregistrements : avec --concurrency > 1, le temps
+    d'attente d'une étape dépasse donc la durée du run.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.stages = defaultdict(StageTimes)
+        self.samples = Counter()   # pile repliée "étape;f1;f2..." -> nombre d'échantillons
+        self.active_stage = None
+        self.started_at = None
+        self.duration = 0.0
+        self._loop_thread = None
+        self._stop = threading.Event()
+        self._sampler = None
+        self._token = None
+
+    def timed(self, stage, awaitable):
+        return _TimedAwaitable(self, stage, awaitable)
+
+    async def iterate(self, stage, aiterable):
+        """Mesure un générateur asynchrone (lecture de la source) élément par élément"""
+        iterator = aiterable.__aiter__()
+        while True:
+            try:
+                item = await self.timed(stage, iterator.__anext__())
+            except StopAsyncIteration:
+                return
+            yield item
+
+    def instrument_pipeline(self, pipeline):
+        """Mesure chaque composant du pipeline comme une étape portant son nom"""
+        for name, node in pipeline._nodes.items():
+            component = node.component
+            # Instrumenté une seule fois (pipeline en cache partagé entre plusieurs runs) : chaque appel
+            # est mesuré par le profileur actif dans son contexte, aucun hors d'un run profilé
+            if getattr(component, "stage_profiled", False):
+                continue
+            component.stage_profiled = True
+            component.run = self._wrap_run(name, component.run)
+
+    @staticmethod
+    def _wrap_run(stage, run):
+        @functools.wraps(run)
+        async def profiled_run(*args, **kwargs):
+            profiler = _active_profiler.get()
+            if profiler is None:
+                return await run(*args, **kwargs)
+            return await profiler.timed(stage, run(*args, **kwargs))
+        return profiled_run
+
+    def start(self):
+        """Active le profileur dans le contexte courant : à appeler avant de créer les tâches du run"""
+        self._token = _active_profiler.set(self)
+        self._loop_thread = threading.get_ident()
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self._stop.clear()
+        self._sampler = threading.Thread(target=self._sample_loop, name="stage-profiler", daemon=True)
+        self._sampler.start()
+
+    def stop(self):
+        _active_profiler.reset(self._token)
+        self._stop.set()
+        self._sampler.join()
+        self.duration = time.perf_counter() - self._start
+
+    def _sample_loop(self):
+        sampler_thread = threading.get_ident()
+        thread_names = {}
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == sampler_thread:
+                    continue
+                if thread_id == self._loop_thread:
+                    root = self.active_stage or IDLE
+                else:
+                    # Threads annexes (lecture PDF, executors) : échantillonnés sous leur nom
+                    if thread_id not in thread_names:
+                        thread_names = {t.ident: t.name for t in threading.enumerate()}
+                    root = f"<thread {thread_names.get(thread_id, thread_id)}>"
+                self.samples[";".join([root] + _stack(frame))] += 1
+
+    def summary(self):
+        samples_by_root = Counter()
+        for stack, count in self.samples.items():
+            samples_by_root[stack.split(";", 1)[0]] += count
+        return {
+            "started_at": self.started_at,
+            "duration": self.duration,
+            "interval": self.interval,
+            "stages": {
+                stage: dict(asdict(times), waiting=times.waiting, samples=samples_by_root.get(stage, 0))
+                for stage, times in self.stages.items()
+            },
+            "other_samples": {root: n for root, n in samples_by_root.items() if root not in self.stages},
+        }
+
+    def report(self):
+        summary = self.summary()
+        lines = [f"{'étape':<28}{'appels':>8}{'total s':>10}{'CPU s':>9}{'attente s':>11}{'% CPU':>8}{'échant.':>9}"]
+        for stage, times in sorted(summary["stages"].items(), key=lambda s: -s[1]["cpu"]):
+            cpu_share = times["cpu"] / times["wall"] if times["wall"] else 0.0
+            lines.append(
+                f"{stage:<28}{times['calls']:>8}{times['wall']:>10.2f}{times['cpu']:>9.2f}"
+                f"{times['waiting']:>11.2f}{cpu_share:>8.0%}{times['samples']:>9}"
+            )
+        for root, count in sorted(summary["other_samples"].items(), key=lambda s: -s[1]):
+            lines.append(f"{root:<28}{'':>46}{count:>9}")
+        lines.append(f"Durée du run : {self.duration:.2f}s, un échantillon toutes les {self.interval * 1000:.0f} ms")
+        return "\n".join(lines)
+
+    def save(self, name, folder=PROFILES_DIR):
+        """Écrit les piles repliées, le flame graph et le résumé du run ; retourne le dossier créé"""
+        run_folder = os.path.join(folder, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}")
+        os.makedirs(run_folder, exist_ok=True)
+        with open(os.path.join(run_folder, "stages.folded"), "w", encoding="utf-8") as f:
+            for stack, count in sorted(self.samples.items()):
+                f.write(f"{stack} {count}\n")
+        with open(os.path.join(run_folder, "flamegraph.svg"), "w", encoding="utf-8") as f:
+            f.write(render_flamegraph(self.samples, title=name))
+        with open(os.path.join(run_folder, "summary.json"), "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2, ensure_ascii=False)
+        return run_folder
+
+
+def _stack(frame):
+    """Pile d'appels de la racine vers la feuille, sans la mécanique de la boucle asyncio"""
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        if code.co_name == "_run" and code.co_filename.endswith(os.path.join("asyncio", "events.py")):
+            break   # Handle._run : début du pas de la tâche en cours
+        if code.co_filename != __file__:   # les enveloppes du profileur n'apportent rien au flame graph
+            stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return stack[::-1]
+
+
+def _color(name):
+    if name == IDLE or name.startswith("<thread"):
+        return "rgb(190,190,190)"
+    digest = hashlib.md5(name.encode("utf-8")).digest()
+    return f"rgb({205 + digest[0] % 50},{digest[1] % 180},{digest[2] % 55})"
+
+
+def render_flamegraph(samples, title="", width=1200, frame_height=16):
+    """Flame graph SVG autonome (survol pour le détail) à partir des piles repliées"""
+    root = {"value": 0, "children": {}}
+    for stack, count in samples.items():
+        node = root
+        node["value"] += count
+        for name in stack.split(";"):
+            node = node["children"].setdefault(name, {"value": 0, "children": {}})
+            node["value"] += count
+
+    def depth(node):
+        return 1 + max((depth(child) for child in node["children"].values()), default=0)
+
+    levels = depth(root)
+    height = (levels + 2) * frame_height
+    total = root["value"] or 1
+    rects = []
+
+    def walk(name, node, x, level):
+        w = node["value"] / total * width
+        if w < 0.3:
+            return
+        y = height - (level + 1) * frame_height
+        label = html.escape(name)
+        text = label if len(name) * 7 < w else (label[:int(w / 7) - 2] + ".." if w > 30 else "")
+        rects.append(
+            f'<g><title>{label} ({node["value"]} échantillons, {node["value"] / total:.1%})</title>'
+            f'<rect x="{x:.1f}" y="{y}" width="{w:.1f}" height="{frame_height - 1}" fill="{_color(name)}"/>'
+            f'<text x="{x + 3:.1f}" y="{y + frame_height - 4}">{text}</text></g>'
+        )
+        for child_name, child in sorted(node["children"].items()):
+            walk(child_name, child, x, level + 1)
+            x += child["value"] / total * width
+
+    walk("all", root, 0.0, 0)
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'font-family="monospace" font-size="11">'
+        f'<text x="4" y="{frame_height - 4}">{html.escape(title)} - {root["value"]} échantillons</text>'
+        + "".join(rects) + "</svg>"
+    )
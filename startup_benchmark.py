@@ -0,0 +1,86 @@
+"""Mesure le temps de démarrage à froid des points d'entrée (import puis initialisation des clients).
+
+Chaque mesure est faite dans un nouvel interpréteur, comme au démarrage d'un pod :
+
+    python startup_benchmark.py            # imports seuls
+    python startup_benchmark.py --init     # + construction des clients (nécessite Neo4j et OpenAI)
+
+Les résultats sont ajoutés à data/startup_benchmark.jsonl pour suivre l'évolution entre commits.
+"""
+import os, sys, json, time, argparse, statistics, subprocess
+
+RESULTS_PATH = "data/startup_benchmark.jsonl"
+
+# Point d'entrée -> code d'initialisation mesuré après l'import
+ENTRY_POINTS = {
+    "app": "app.get_rag()",
+    "streamlit_interface": "streamlit_interface.get_graph_rag()",
+    "ingest": "ingest.get_pipeline('maintenance')",
+    "Graphe_RAG_Maintenance": None,
+    "graph_rag": None,
+    "ingestion_queue": None,
+}
+
+# Dépendances lourdes mesurées seules, comme référence
+DEPENDENCIES = ["neo4j", "neo4j_graphrag", "openai", "pandas", "numpy", "tqdm", "pypdf", "streamlit"]
+
+MEASURE = """
+import time
+start = time.perf_counter()
+import {module}
+imported = time.perf_counter()
+{init}
+print(imported - start, time.perf_counter() - imported)
+"""
+
+
+def measure(module, init=None):
+    """Temps d'import et d'initialisation (en secondes) dans un interpréteur neuf"""
+    code = MEASURE.format(module=module, init=init or "")
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    if result.returncode != 0:
+        return None
+    import_time, init_time = map(float, result.stdout.strip().splitlines()[-1].split())
+    return import_time, init_time
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+def run(repeat=3, init=False):
+    results = {}
+    for name, init_code in list(ENTRY_POINTS.items()) + [(d, None) for d in DEPENDENCIES]:
+        samples = [measure(name, init_code if init else None) for _ in range(repeat)]
+        samples = [s for s in samples if s is not None]
+        if not samples:
+            print(f"{name:<26}{'échec':>12}")
+            continue
+        import_time = statistics.median(s[0] for s in samples)
+        init_time = statistics.median(s[1] for s in samples)
+        results[name] = {"import": import_time, "init": init_time}
+        print(f"{name:<26}{import_time * 1000:>10.0f} ms{init_time * 1000:>10.0f} ms")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Temps de démarrage à froid des points d'entrée")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--init", action="store_true", help="mesure aussi la construction des clients")
+    args = parser.parse_args()
+
+    print(f"{'module':<26}{'import':>13}{'init':>13}")
+    results = run(repeat=args.repeat, init=args.init)
+    with open(RESULTS_PATH, "a", encoding="utf-8") as f:
+        f.write(json.dumps({
+            "timestamp": time.time(),
+            "revision": git_revision(),
+            "init": args.init,
+            "results": results,
+        }) + "\n")
@@ -1,36 +1,42 @@
 import os
-import neo4j
 import asyncio
 import json
 import streamlit as st
-from dotenv import load_dotenv
-from neo4j_graphrag.llm import OpenAILLM as LLM
-from neo4j_graphrag.embeddings.openai import OpenAIEmbeddings
-from neo4j_graphrag.experimental.pipeline.query import GraphRAG
 
-# Charger les variables d'environnement
-load_dotenv()
+# Les modules neo4j_graphrag / openai et les clients ne sont chargés qu'à la première question,
+# puis conservés par Streamlit entre les reruns et les sessions
+@st.cache_resource
+def get_graph_rag():
+    import neo4j
+    from dotenv import load_dotenv
+    from neo4j_graphrag.llm import OpenAILLM as LLM
+    from neo4j_graphrag.embeddings.openai import OpenAIEmbeddings
+    from neo4j_graphrag.experimental.pipeline.query import GraphRAG
+    from embedding_config import get_embedding_model
 
-# Connexion à Neo4j
-neo4j_driver = neo4j.GraphDatabase.driver(
-    os.getenv("NEO4J_URI"),
-    auth=(os.getenv("NEO4J_USERNAME"), os.getenv("NEO4J_PASSWORD"))
-)
+    # Charger les variables d'environnement
+    load_dotenv()
 
-# Configuration du modèle de langage
-llm = LLM(
-    model_name="gpt-4o-mini",
-    model_params={"response_format": {"type": "json_object"}, "temperature": 0}
-)
+    # Connexion à Neo4j
+    neo4j_driver = neo4j.GraphDatabase.driver(
+        os.getenv("NEO4J_URI"),
+        auth=(os.getenv("NEO4J_USERNAME"), os.getenv("NEO4J_PASSWORD"))
+    )
 
-embedder = OpenAIEmbeddings()
+    # Configuration du modèle de langage
+    llm = LLM(
+        model_name="gpt-4o-mini",
+        model_params={"response_format": {"type": "json_object"}, "temperature": 0}
+    )
 
-# Initialisation de GraphRAG
-graph_rag = GraphRAG(
-    llm=llm,
-    driver=neo4j_driver,
-    embedder=embedder,
-)
+    embedder = OpenAIEmbeddings(model=get_embedding_model())
+
+    # Initialisation de GraphRAG
+    return GraphRAG(
+        llm=llm,
+        driver=neo4j_driver,
+        embedder=embedder,
+    )
 
 async def query_graph(question: str):
     """
@@ -40,7 +46,7 @@ async def query_graph(question: str):
         print(f"Question utilisateur : {question}")
         
         # Effectuer la requête GraphRAG
-        response = await graph_rag.run_async(question=question)
+        response = await get_graph_rag().run_async(question=question)
         
         # Vérifier si la réponse est une chaîne JSON valide
         if isinstance(response, str):
@@ -0,0 +1,250 @@
+"""Indexation temporelle des interventions : date typée sur les chunks, index de plage et fenêtres de temps.
+
+Les chunks des rapports d'intervention portent une propriété `date` (type DATE Neo4j) couverte par un
+index de plage. Une question comme "pannes du dernier trimestre" est convertie en fenêtre de dates,
+qui filtre les chunks avant le calcul de similarité (voir RerankingRetriever) : le coût de la
+recherche suit la taille de la fenêtre et non plus tout l'historique.
+
+    python temporal.py setup            # index + dates des chunks déjà ingérés
+    python temporal.py parse "pannes du mois dernier"
+"""
+import re, datetime, argparse, unicodedata
+from dataclasses import dataclass
+
+DATE_PROPERTY = "date"
+
+MONTHS = {
+    "janvier": 1, "fevrier": 2, "mars": 3, "avril": 4, "mai": 5, "juin": 6, "juillet": 7,
+    "aout": 8, "septembre": 9, "octobre": 10, "novembre": 11, "decembre": 12,
+}
+NUMBERS = {
+    "un": 1, "une": 1, "deux": 2, "trois": 3, "quatre": 4, "cinq": 5, "six": 6, "sept": 7,
+    "huit": 8, "neuf": 9, "dix": 10, "onze": 11, "douze": 12,
+}
+MONTH = "(" + "|".join(MONTHS) + r")\b"
+DATE = r"(\d{4}-\d{2}-\d{2}|\d{1,2}/\d{1,2}/\d{4})"
+YEAR = r"((?:19|20)\d{2})"
+
+RANGE_PATTERN = re.compile(rf"\b(?:entre le|entre|du) {DATE} (?:et le|et|au) {DATE}")
+SINCE_DATE_PATTERN = re.compile(rf"\bdepuis (?:le )?{DATE}")
+SINCE_MONTH_PATTERN = re.compile(rf"\bdepuis (?:le mois de |le debut de |)?{MONTH}(?: {YEAR})?")
+SINCE_YEAR_PATTERN = re.compile(rf"\bdepuis {YEAR}")
+ROLLING_PATTERN = re.compile(
+    rf"\b(\d+|{'|'.join(NUMBERS)}) derni(?:er|ere)s? (jours?|semaines?|mois|ans|annees?)"
+)
+# Trimestre : "T3"/"Q1" seuls désignent souvent un outil ou une pièce (poinçon T3, pièce Q1), ils ne sont
+# acceptés qu'à côté d'une année ou du mot trimestre
+QUARTER_YEAR = r"(?P<year>(?:19|20)\d{2})"
+QUARTER_PATTERNS = [
+    re.compile(rf"\b(?P<quarter>[1-4])(?:er|e|eme) trimestre(?: (?:de |)?{QUARTER_YEAR}\b)?"),
+    re.compile(rf"\btrimestre (?:[tq])?(?P<quarter>[1-4])\b(?: (?:de |)?{QUARTER_YEAR}\b)?"),
+    re.compile(rf"\b[tq](?P<quarter>[1-4]) (?:de |)?{QUARTER_YEAR}\b"),
+    re.compile(rf"\b{QUARTER_YEAR}[ -/]?[tq](?P<quarter>[1-4])\b"),
+]
+MONTH_PATTERN = re.compile(rf"\b(?:en|de|d'|du mois de|au mois de|mois de) ?{MONTH}(?: {YEAR})?")
+YEAR_PATTERN = re.compile(rf"\b(?:en|de l'annee|annee|au cours de|pendant|durant) {YEAR}\b")
+
+# Expressions relatives au jour courant : motif -> (unité, décalage), 0 = période en cours jusqu'à aujourd'hui
+RELATIVE_PERIODS = [
+    (re.compile(r"\b(?:dernier trimestre|trimestre dernier|trimestre precedent|trimestre passe)"), ("quarter", -1)),
+    (re.compile(r"\b(?:ce trimestre|trimestre en cours)"), ("quarter", 0)),
+    (re.compile(r"\b(?:mois dernier|mois precedent|mois passe|dernier mois)"), ("month", -1)),
+    (re.compile(r"\b(?:ce mois|mois en cours)"), ("month", 0)),
+    (re.compile(r"\b(?:semaine derniere|semaine precedente|semaine passee|derniere semaine)"), ("week", -1)),
+    (re.compile(r"\b(?:cette semaine|semaine en cours)"), ("week", 0)),
+    (re.compile(r"\b(?:annee derniere|annee precedente|annee passee|l'an dernier|l'an passe|derniere annee)"), ("year", -1)),
+    (re.compile(r"\b(?:cette annee|annee en cours)"), ("year", 0)),
+    (re.compile(r"\bhier\b"), ("day", -1)),
+    (re.compile(r"\baujourd'hui\b"), ("day", 0)),
+]
+
+
+@dataclass(frozen=True)
+class TimeWindow:
+    start: datetime.date
+    end: datetime.date
+    expression: str
+
+    def as_filter(self, date_property=DATE_PROPERTY):
+        """Filtre au format neo4j_graphrag (VectorRetriever.search(filters=...))"""
+        return {date_property: {"$between": [self.start, self.end]}}
+
+
+def _normalize(text):
+    text = unicodedata.normalize("NFKD", text.lower()).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"\s+", " ", text.replace("’", "'"))
+
+
+def _parse_date(value):
+    if "/" in value:
+        day, month, year = map(int, value.split("/"))
+        return datetime.date(year, month, day)
+    return datetime.date.fromisoformat(value)
+
+
+def _add_months(day, months):
+    month_index = day.year * 12 + day.month - 1 + months
+    return datetime.date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def _month_window(year, month):
+    start = datetime.date(year, month, 1)
+    return start, _add_months(start, 1) - datetime.timedelta(days=1)
+
+
+def _period(unit, offset, today):
+    """Période calendaire contenant `today`, décalée de `offset` ; la période en cours s'arrête à aujourd'hui"""
+    if unit == "day":
+        start = end = today + datetime.timedelta(days=offset)
+    elif unit == "week":
+        start = today - datetime.timedelta(days=today.weekday()) + datetime.timedelta(weeks=offset)
+        end = start + datetime.timedelta(days=6)
+    elif unit == "month":
+        start = _add_months(today.replace(day=1), offset)
+        end = _add_months(start, 1) - datetime.timedelta(days=1)
+    elif unit == "quarter":
+        start = _add_months(datetime.date(today.year, 3 * ((today.month - 1) // 3) + 1, 1), 3 * offset)
+        end = _add_months(start, 3) - datetime.timedelta(days=1)
+    else:
+        start = datetime.date(today.year + offset, 1, 1)
+        end = datetime.date(today.year + offset, 12, 31)
+    if offset == 0:
+        end = min(end, today)
+    return start, end
+
+
+def _last_occurrence(month, today):
+    """Année du dernier mois `month` écoulé ou en cours ("en mars" posé en janvier = mars de l'an dernier)"""
+    return today.year if month <= today.month else today.year - 1
+
+
+def parse_time_window(question, today=None):
+    """Extrait une fenêtre de dates d'une question en français ; None si la question n'en contient pas"""
+    today = today or datetime.date.today()
+    text = _normalize(question)
+    try:
+        match = RANGE_PATTERN.search(text)
+        if match:
+            start, end = sorted((_parse_date(match.group(1)), _parse_date(match.group(2))))
+            return TimeWindow(start, end, match.group(0))
+
+        match = SINCE_DATE_PATTERN.search(text)
+        if match:
+            return TimeWindow(_parse_date(match.group(1)), today, match.group(0))
+        match = SINCE_MONTH_PATTERN.search(text)
+        if match:
+            month = MONTHS[match.group(1)]
+            year = int(match.group(2)) if match.group(2) else _last_occurrence(month, today)
+            return TimeWindow(datetime.date(year, month, 1), today, match.group(0))
+        match = SINCE_YEAR_PATTERN.search(text)
+        if match:
+            return TimeWindow(datetime.date(int(match.group(1)), 1, 1), today, match.group(0))
+
+        match = ROLLING_PATTERN.search(text)
+        if match:
+            count = int(match.group(1)) if match.group(1).isdigit() else NUMBERS[match.group(1)]
+            unit = match.group(2)
+            if unit.startswith("jour"):
+                start = today - datetime.timedelta(days=count)
+            elif unit.startswith("semaine"):
+                start = today - datetime.timedelta(weeks=count)
+            elif unit == "mois":
+                start = _add_months(today.replace(day=1), -count).replace(day=min(today.day, 28))
+            else:
+                start = today.replace(year=today.year - count, day=min(today.day, 28))
+            return TimeWindow(start, today, match.group(0))
+
+        for pattern, (unit, offset) in RELATIVE_PERIODS:
+            match = pattern.search(text)
+            if match:
+                start, end = _period(unit, offset, today)
+                return TimeWindow(start, end, match.group(0))
+
+        for pattern in QUARTER_PATTERNS:
+            match = pattern.search(text)
+            if match:
+                quarter = int(match.group("quarter"))
+                year = int(match.group("year")) if match.group("year") else today.year
+                start = datetime.date(year, 3 * quarter - 2, 1)
+                return TimeWindow(start, _add_months(start, 3) - datetime.timedelta(days=1), match.group(0))
+
+        match = MONTH_PATTERN.search(text)
+        if match:
+            month = MONTHS[match.group(1)]
+            year = int(match.group(2)) if match.group(2) else _last_occurrence(month, today)
+            return TimeWindow(*_month_window(year, month), match.group(0))
+
+        match = YEAR_PATTERN.search(text)
+        if match:
+            year = int(match.group(1))
+            return TimeWindow(datetime.date(year, 1, 1), datetime.date(year, 12, 31), match.group(0))
+    except ValueError:
+        # Date impossible ("31/02/2025") : pas de filtre plutôt qu'une erreur
+        return None
+    return None
+
+
+def create_date_index(driver, label="Chunk", date_property=DATE_PROPERTY, database=None):
+    """Index de plage sur la date des chunks, utilisé par le filtre de fenêtre de temps"""
+    index_name = f"{label.lower()}_{date_property}_index"
+    driver.execute_query(
+        f"CREATE RANGE INDEX {index_name} IF NOT EXISTS FOR (n:`{label}`) ON (n.`{date_property}`)",
+        database_=database,
+    )
+    return index_name
+
+
+# Chunks ingérés avant l'ajout de la date typée : la date est relue dans le texte "Case_N - AAAA-MM-JJ - ..."
+# (gabarit passé à str.format : les accolades de la regex sont doublées)
+BACKFILL_QUERY = """
+MATCH (c:{label})
+WHERE c.date IS NULL AND c.text =~ '(?s)Case_\\\\d+ - \\\\d{{4}}-\\\\d{{2}}-\\\\d{{2}} - .*'
+WITH c LIMIT $batch_size
+SET c.date = date(split(c.text, ' - ')[1])
+RETURN count(c) AS count
+"""
+
+
+def backfill_chunk_dates(driver, batch_size=5000, database=None, label="Chunk"):
+    """Ajoute la date typée aux chunks d'interventions déjà ingérés, par lots"""
+    total = 0
+    while True:
+        records, _, _ = driver.execute_query(
+            BACKFILL_QUERY.format(label=f"`{label}`"), batch_size=batch_size, database_=database
+        )
+        if records[0]["count"] == 0:
+            return total
+        total += records[0]["count"]
+        print(f"{total} chunks datés")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Indexation temporelle des interventions")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    setup_parser = subparsers.add_parser("setup", help="crée l'index de plage et date les chunks existants")
+    setup_parser.add_argument("--tenant", help="chunks du tenant au lieu des chunks communs (voir tenants.py)")
+    parse_parser = subparsers.add_parser("parse", help="affiche la fenêtre de temps extraite d'une question")
+    parse_parser.add_argument("question")
+    args = parser.parse_args()
+
+    if args.command == "parse":
+        print(parse_time_window(args.question))
+    else:
+        import os, neo4j
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        neo4j_driver = neo4j.GraphDatabase.driver(
+            os.getenv("NEO4J_URI"),
+            auth=(os.getenv("NEO4J_USERNAME"), os.getenv("NEO4J_PASSWORD"))
+        )
+        try:
+            label, database = "Chunk", None
+            if args.tenant:
+                from tenants import get_tenant
+                tenant = get_tenant(args.tenant)
+                label, database = tenant.chunk_label, tenant.database
+            print(f"Index {create_date_index(neo4j_driver, label, database=database)} créé")
+            print(f"{backfill_chunk_dates(neo4j_driver, database=database, label=label)} chunks datés au total")
+        finally:
+            neo4j_driver.close()
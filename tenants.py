@@ -0,0 +1,178 @@
+"""Partitionnement du graphe par jeu de données (tenant) : usine, corpus médical, etc.
+
+Chaque tenant a son label, posé sur tous les noeuds qu'il ingère. Ses chunks portent un label
+propre (ex. Tenant_Fette_Chunk) à la place de :Chunk : ils ne figurent que dans l'index vectoriel
+du tenant, pas dans l'index commun. Un tenant peut aussi avoir sa propre base Neo4j (`database`).
+La recherche vectorielle et la résolution d'entités ne parcourent ainsi que les données du tenant.
+
+    python tenants.py create-index fette
+    python tenants.py migrate-chunks fette     # chunks ingérés avec :Chunk avant le label propre
+"""
+import argparse
+from dataclasses import dataclass
+from typing import Optional
+
+from neo4j_graphrag.experimental.components.kg_writer import Neo4jWriter
+from neo4j_graphrag.experimental.components.types import LexicalGraphConfig
+
+
+@dataclass(frozen=True)
+class Tenant:
+    name: str
+    label: str
+    index_name: str
+    profile: str
+    database: Optional[str] = None
+
+    @property
+    def chunk_label(self):
+        return f"{self.label}_Chunk"
+
+    @property
+    def lexical_graph_config(self):
+        """Labels du graphe lexical du tenant : ses chunks et documents restent hors de l'index commun"""
+        return LexicalGraphConfig(chunk_node_label=self.chunk_label, document_node_label=f"{self.label}_Document")
+
+
+# Labels de tenant : "Tenant_<Nom>"
+TENANT_LABEL_PREFIX = "Tenant_"
+
+# Résolution d'entités des pipelines sans tenant (SinglePropertyExactMatchResolver) : les entités des
+# tenants en sont exclues, elles sont résolues par tenant (resolve_tenant_entities)
+SHARED_ENTITIES_FILTER = f"WHERE none(lab IN labels(entity) WHERE lab STARTS WITH '{TENANT_LABEL_PREFIX}')"
+
+TENANTS = {
+    "fette": Tenant("fette", "Tenant_Fette", "fette_vector_index", "maintenance"),
+    "alzheimer": Tenant("alzheimer", "Tenant_Alzheimer", "alzheimer_vector_index", "alzheimer"),
+    "phee": Tenant("phee", "Tenant_Phee", "phee_vector_index", "phee_v2"),
+}
+
+
+def get_tenant(name):
+    try:
+        return TENANTS[name]
+    except KeyError:
+        raise ValueError(f"Unknown tenant: {name}. Available tenants: {', '.join(sorted(TENANTS))}")
+
+
+class TenantNeo4jWriter(Neo4jWriter):
+    """Neo4jWriter qui ajoute le label du tenant à tous les noeuds écrits (chunks, documents, entités).
+
+    Le pipeline ne transmet pas sa configuration lexicale au writer : sans la sienne, les chunks du
+    tenant recevraient le label __Entity__.
+    """
+
+    def __init__(self, driver, tenant_label, lexical_graph_config=None, neo4j_database=None, batch_size=1000):
+        super().__init__(driver, neo4j_database=neo4j_database, batch_size=batch_size)
+        self.tenant_label = tenant_label
+        self.lexical_graph_config = lexical_graph_config
+
+    def _nodes_to_rows(self, nodes, lexical_graph_config):
+        rows = super()._nodes_to_rows(nodes, self.lexical_graph_config or lexical_graph_config)
+        for row in rows:
+            row["labels"].append(self.tenant_label)
+        return rows
+
+
+# Même règle que SinglePropertyExactMatchResolver (même label et même nom), limitée aux entités du tenant.
+# Le label du tenant est exclu du regroupement pour ne pas fusionner des entités de types différents.
+RESOLVE_QUERY = """
+MATCH (entity:__Entity__:{label})
+WITH entity, entity.name AS prop WHERE prop IS NOT NULL
+UNWIND labels(entity) AS lab
+WITH lab, prop, entity WHERE NOT lab IN ['__Entity__', '__KGBuilder__', $tenant_label]
+WITH prop, lab, collect(entity) AS entities
+WHERE size(entities) > 1
+CALL apoc.refactor.mergeNodes(entities, {{properties: 'discard', mergeRels: true}})
+YIELD node
+RETURN count(node) AS c
+"""
+
+
+def resolve_tenant_entities(driver, tenant):
+    """Fusionne les doublons d'entités du tenant ; à lancer une fois par run plutôt qu'après chaque enregistrement"""
+    records, _, _ = driver.execute_query(
+        RESOLVE_QUERY.format(label=f"`{tenant.label}`"),
+        tenant_label=tenant.label,
+        database_=tenant.database,
+    )
+    return records[0]["c"] if records else 0
+
+
+# Chunks ingérés avant le label propre : ils quittent :Chunk, donc l'index commun
+MIGRATE_CHUNKS_QUERY = """
+MATCH (c:Chunk:{label})
+WITH c LIMIT $batch_size
+SET c:{chunk_label}
+REMOVE c:Chunk
+RETURN count(c) AS count
+"""
+
+
+def migrate_tenant_chunks(driver, tenant, batch_size=5000):
+    """Remplace :Chunk par le label de chunk du tenant sur ses chunks existants, par lots"""
+    total = 0
+    while True:
+        records, _, _ = driver.execute_query(
+            MIGRATE_CHUNKS_QUERY.format(label=f"`{tenant.label}`", chunk_label=f"`{tenant.chunk_label}`"),
+            batch_size=batch_size,
+            database_=tenant.database,
+        )
+        if records[0]["count"] == 0:
+            return total
+        total += records[0]["count"]
+
+
+def create_tenant_index(driver, tenant, dimensions, embedding_property="embedding"):
+    """Index vectoriel du tenant, limité au label de ses chunks"""
+    from neo4j_graphrag.indexes import create_vector_index
+
+    create_vector_index(
+        driver,
+        tenant.index_name,
+        label=tenant.chunk_label,
+        embedding_property=embedding_property,
+        dimensions=dimensions,
+        similarity_fn="cosine",
+        neo4j_database=tenant.database,
+    )
+
+
+if __name__ == "__main__":
+    import os, neo4j
+    from dotenv import load_dotenv
+    from embedding_config import get_dimensions
+
+    parser = argparse.ArgumentParser(description="Gestion des partitions du graphe")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    index_parser = subparsers.add_parser("create-index")
+    index_parser.add_argument("tenant", choices=sorted(TENANTS))
+    index_parser.add_argument("--model", help="modèle d'embedding (par défaut EMBEDDING_MODEL)")
+    resolve_parser = subparsers.add_parser("resolve")
+    resolve_parser.add_argument("tenant", choices=sorted(TENANTS))
+    migrate_parser = subparsers.add_parser("migrate-chunks")
+    migrate_parser.add_argument("tenant", choices=sorted(TENANTS))
+    args = parser.parse_args()
+
+    load_dotenv()
+    neo4j_driver = neo4j.GraphDatabase.driver(
+        os.getenv("NEO4J_URI"),
+        auth=(os.getenv("NEO4J_USERNAME"), os.getenv("NEO4J_PASSWORD"))
+    )
+    try:
+        tenant = get_tenant(args.tenant)
+        if args.command == "create-index":
+            create_tenant_index(neo4j_driver, tenant, get_dimensions(args.model))
+            print(f"Index {tenant.index_name} créé sur :{tenant.chunk_label}")
+        elif args.command == "migrate-chunks":
+            from neo4j_graphrag.indexes import drop_index_if_exists
+
+            print(f"{migrate_tenant_chunks(neo4j_driver, tenant)} chunks passés de :Chunk à :{tenant.chunk_label}")
+            # L'ancien index du tenant portait sur son label et non sur celui de ses chunks
+            drop_index_if_exists(neo4j_driver, tenant.index_name, neo4j_database=tenant.database)
+            create_tenant_index(neo4j_driver, tenant, get_dimensions())
+            print(f"Index {tenant.index_name} recréé sur :{tenant.chunk_label}")
+        else:
+            print(f"{resolve_tenant_entities(neo4j_driver, tenant)} entités fusionnées pour {tenant.name}")
+    finally:
+        neo4j_driver.close()
@@ -0,0 +1,161 @@
+import json
+import asyncio
+
+import pytest
+from neo4j_graphrag.exceptions import LLMGenerationError
+from neo4j_graphrag.experimental.components.entity_relation_extractor import OnError
+from neo4j_graphrag.experimental.components.schema import SchemaConfig
+from neo4j_graphrag.experimental.components.types import TextChunk
+from neo4j_graphrag.experimental.pipeline.exceptions import InvalidJSONError
+from neo4j_graphrag.llm.types import LLMResponse
+
+from extraction_validation import ValidatingExtractor, parse_llm_json, validate_graph
+
+LABELS = ["Machine", "Piece"]
+RELATION_TYPES = ["A_POUR_PIECE"]
+
+VALID = {
+    "nodes": [
+        {"id": "0", "label": "Machine", "properties": {"name": "Fette 2090"}},
+        {"id": "1", "label": "Piece", "properties": {"name": "Poinçon"}},
+    ],
+    "relationships": [{"type": "A_POUR_PIECE", "start_node_id": "0", "end_node_id": "1", "properties": {}}],
+}
+
+
+@pytest.mark.parametrize("content", [
+    # Virgules finales
+    '{"nodes": [{"id": "0", "label": "Machine", "properties": {"name": "Fette 2090"}},], "relationships": [],}',
+    # Bloc de code et texte autour
+    'Voici le graphe :\n```json\n{"nodes": [{"id": "0", "label": "Machine", "properties": {"name": "Fette 2090"}}], '
+    '"relationships": []}\n```',
+    # Réponse tronquée (accolades et crochets non refermés)
+    '{"nodes": [{"id": "0", "label": "Machine", "properties": {"name": "Fette 2090"}}], "relationships": [',
+])
+def test_parse_repairs_common_llm_mistakes(content):
+    data, repaired = parse_llm_json(content)
+    assert repaired
+    assert data["nodes"] == [{"id": "0", "label": "Machine", "properties": {"name": "Fette 2090"}}]
+    assert data.get("relationships", []) == []
+
+
+def test_parse_keeps_commas_and_braces_inside_strings():
+    content = '{"nodes": [{"id": "0", "label": "Piece", "properties": {"name": "joint ,} torique",},}], "relationships": []}'
+    data, _ = parse_llm_json(content)
+    assert data["nodes"][0]["properties"]["name"] == "joint ,} torique"
+
+
+def test_parse_valid_json_is_not_marked_repaired():
+    assert parse_llm_json(json.dumps(VALID)) == (VALID, False)
+
+
+@pytest.mark.parametrize("content", ["[1, 2, 3]", "42"])
+def test_parse_rejects_non_objects(content):
+    with pytest.raises(InvalidJSONError):
+        parse_llm_json(content)
+
+
+def test_validate_fixes_label_case_and_relation_by_name():
+    data = {
+        "nodes": [
+            {"id": "0", "type": "machine", "name": "Fette 2090"},
+            {"id": "1", "label": "PIÈCE", "properties": {"name": "Poinçon"}},
+        ],
+        "relationships": [{"type": "a pour pièce", "source": "Fette 2090", "target": "1"}],
+    }
+    result = validate_graph(data, LABELS, RELATION_TYPES)
+    assert not result.rejected
+    assert [node["label"] for node in result.nodes] == ["Machine", "Piece"]
+    assert result.relationships == [
+        {"type": "A_POUR_PIECE", "start_node_id": "0", "end_node_id": "1", "properties": {}}
+    ]
+    assert result.fixes > 0
+
+
+def test_validate_rejects_unknown_label_and_relation_type():
+    data = {
+        "nodes": VALID["nodes"] + [{"id": "2", "label": "Technicien", "properties": {"name": "Paul"}}],
+        "relationships": [
+            {"type": "REPARE", "start_node_id": "2", "end_node_id": "0"},
+            {"type": "UTILISE", "start_node_id": "0", "end_node_id": "1"},
+            {"type": "A_POUR_PIECE", "start_node_id": "0", "end_node_id": "9"},
+        ],
+    }
+    result = validate_graph(data, LABELS, RELATION_TYPES)
+    assert [node["id"] for node in result.nodes] == ["0", "1"]
+    assert result.relationships == []
+    problems = [problem for _, problem in result.rejected]
+    assert problems == [
+        "label 'Technicien' absent du schéma",
+        "type de relation 'REPARE' absent du schéma",
+        "type de relation 'UTILISE' absent du schéma",
+        "relation pendante ('0' -> '9')",
+    ]
+
+
+class FakeLLM:
+    """LLM qui renvoie les réponses prévues dans l'ordre et garde les prompts reçus"""
+
+    def __init__(self, *answers):
+        self.answers = list(answers)
+        self.prompts = []
+
+    async def ainvoke(self, prompt):
+        self.prompts.append(prompt)
+        return LLMResponse(content=self.answers.pop(0))
+
+
+def extract(llm, on_error=OnError.IGNORE, max_repair_calls=1):
+    schema = SchemaConfig(
+        entities={label: {"label": label, "properties": []} for label in LABELS},
+        relations={rel_type: {"label": rel_type, "properties": []} for rel_type in RELATION_TYPES},
+        potential_schema=None,
+    )
+    extractor = ValidatingExtractor(
+        llm=llm, prompt_template="{text}{schema}{examples}", on_error=on_error, max_repair_calls=max_repair_calls
+    )
+    graph = asyncio.run(extractor.extract_for_chunk(schema, "", TextChunk(text="Poinçon changé sur la Fette", index=0)))
+    return graph, extractor.stats
+
+
+def test_valid_answer_does_not_call_the_llm_again():
+    llm = FakeLLM(json.dumps(VALID))
+    graph, stats = extract(llm)
+    assert len(llm.prompts) == 1
+    assert len(graph.nodes) == 2 and len(graph.relationships) == 1
+    assert (stats.valid, stats.repair_calls) == (1, 0)
+
+
+def test_only_rejected_items_are_sent_for_repair():
+    first = dict(VALID, relationships=[{"type": "CONTIENT", "start_node_id": "0", "end_node_id": "1"}])
+    llm = FakeLLM(json.dumps(first), json.dumps({"nodes": [], "relationships": VALID["relationships"]}))
+    graph, stats = extract(llm)
+    assert len(llm.prompts) == 2
+    assert "CONTIENT" in llm.prompts[1] and "absent du schéma" in llm.prompts[1]
+    assert len(graph.nodes) == 2 and len(graph.relationships) == 1
+    assert (stats.repair_calls, stats.dropped) == (1, 0)
+
+
+def test_repair_is_limited_to_one_llm_call():
+    invalid = {"nodes": [{"id": "0", "label": "Technicien", "properties": {"name": "Paul"}}], "relationships": []}
+    llm = FakeLLM(json.dumps(invalid), json.dumps(invalid), json.dumps(invalid))
+    graph, stats = extract(llm)
+    assert len(llm.prompts) == 2
+    assert graph.nodes == []
+    assert (stats.repair_calls, stats.dropped) == (1, 1)
+
+
+def test_unparsable_answer_goes_through_the_repair_prompt():
+    llm = FakeLLM("Désolé, je ne peux pas extraire ce texte.", json.dumps(VALID))
+    graph, stats = extract(llm)
+    assert "Désolé, je ne peux pas" in llm.prompts[1]
+    assert len(graph.nodes) == 2
+    assert (stats.unparsable, stats.repair_calls) == (1, 1)
+
+
+def test_unparsable_answer_raises_only_if_the_repair_fails():
+    llm = FakeLLM("pas de JSON", "toujours pas de JSON")
+    with pytest.raises(LLMGenerationError):
+        extract(llm, on_error=OnError.RAISE)
+    graph, _ = extract(FakeLLM("pas de JSON", json.dumps(VALID)), on_error=OnError.RAISE)
+    assert len(graph.nodes) == 2
@@ -0,0 +1,28 @@
+import datetime
+
+import pytest
+from neo4j.spatial import CartesianPoint, WGS84Point
+from neo4j.time import Date, DateTime, Duration, Time
+
+from graph_snapshot import dump_properties, load_properties
+
+PARIS = datetime.timezone(datetime.timedelta(hours=2))
+
+VALUES = [
+    (Date(2024, 3, 5), datetime.date(2024, 3, 5)),
+    (DateTime(2024, 3, 5, 10, 1, 2, tzinfo=PARIS), datetime.datetime(2024, 3, 5, 10, 1, 2, tzinfo=PARIS)),
+    (DateTime(2024, 3, 5, 10, 1, 2), datetime.datetime(2024, 3, 5, 10, 1, 2)),
+    (Time(10, 20, 30), datetime.time(10, 20, 30)),
+    (Duration(months=1, days=2, seconds=3, nanoseconds=5), Duration(months=1, days=2, seconds=3, nanoseconds=5)),
+    (WGS84Point((2.35, 48.85)), WGS84Point((2.35, 48.85))),
+    (CartesianPoint((1.0, 2.0, 3.0)), CartesianPoint((1.0, 2.0, 3.0))),
+    ([Date(2024, 1, 1), Date(2024, 1, 2)], [datetime.date(2024, 1, 1), datetime.date(2024, 1, 2)]),
+    ("Fuite d'huile", "Fuite d'huile"),
+]
+
+
+@pytest.mark.parametrize("value,expected", VALUES)
+def test_property_round_trip(value, expected):
+    restored = load_properties(dump_properties({"value": value}))["value"]
+    assert restored == expected
+    assert type(restored) is type(expected)
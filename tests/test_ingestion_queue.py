@@ -0,0 +1,136 @@
+import asyncio
+
+import pytest
+
+import ingest
+import pdf_streaming
+import ingestion_queue
+from ingestion_queue import (
+    MAX_ATTEMPTS, PRIORITY_BACKLOG, PRIORITY_NORMAL, PRIORITY_URGENT, RETRY_DELAY, JobQueue, handle_pdf, scan_sources,
+)
+
+HEADER = "Date,Technicien,Rapport d'Intervention,Pièce Remplacée\n"
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / "queue.db"))
+
+
+def drain(queue):
+    jobs = []
+    while (job := queue.claim()) is not None:
+        jobs.append(job)
+        queue.complete(job["id"])
+    return jobs
+
+
+def test_csv_row_still_being_written_is_read_on_the_next_scan(queue, tmp_path):
+    path = tmp_path / "interventions.csv"
+    path.write_text(HEADER + "2025-01-10,Paul,Fuite d'huile,Joint\n2025-01-11,Marie,Vibrations de la tour", encoding="utf-8")
+    assert scan_sources(queue, csv_paths=[str(path)]) == 1
+
+    # Champ entre guillemets sur plusieurs lignes, pas encore refermé
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("elle,None\n2025-01-12,Paul,\"Éjection des comprimés\n")
+    assert scan_sources(queue, csv_paths=[str(path)]) == 1
+
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("bloquée\",Poinçon\n")
+    assert scan_sources(queue, csv_paths=[str(path)]) == 1
+
+    # Premier passage en tâche de fond, lignes suivantes en urgence : on compare dans l'ordre du fichier
+    rows = [job["payload"]["row"] for job in sorted(drain(queue), key=lambda job: job["payload"]["index"])]
+    assert [row["Technicien"] for row in rows] == ["Paul", "Marie", "Paul"]
+    assert rows[1]["Rapport d'Intervention"] == "Vibrations de la tourelle"
+    assert rows[2]["Rapport d'Intervention"] == "Éjection des comprimés\nbloquée"
+
+
+def test_rescanning_does_not_enqueue_twice(queue, tmp_path):
+    csv_path = tmp_path / "interventions.csv"
+    csv_path.write_text(HEADER + "2025-01-10,Paul,Fuite d'huile,Joint\n", encoding="utf-8")
+    jsonl_path = tmp_path / "phee.jsonl"
+    jsonl_path.write_text('{"id": "1", "context": "a"}\n{"id": "2", "context": "b"}\n{"id": "3"', encoding="utf-8")
+    pdfs = tmp_path / "pdfs"
+    pdfs.mkdir()
+    (pdfs / "article.pdf").write_bytes(b"%PDF")
+    sources = dict(csv_paths=[str(csv_path)], jsonl_paths=[str(jsonl_path)], pdfs_folder=str(pdfs))
+
+    assert scan_sources(queue, **sources) == 4
+    assert scan_sources(queue, **sources) == 0
+    with open(jsonl_path, "a", encoding="utf-8") as f:
+        f.write(', "context": "c"}\n')
+    assert scan_sources(queue, **sources) == 1
+    assert [job["kind"] for job in drain(queue)].count("jsonl") == 3
+
+
+def test_scan_interrupted_midway_enqueues_nothing(queue, tmp_path, monkeypatch):
+    path = tmp_path / "interventions.csv"
+    path.write_text(HEADER + "2025-01-10,Paul,Fuite d'huile,Joint\n2025-01-11,Marie,Vibrations,None\n", encoding="utf-8")
+    enqueue = queue.enqueue
+
+    def crash_on_second_row(kind, payload, priority=PRIORITY_NORMAL):
+        if payload["index"] == 1:
+            raise KeyboardInterrupt
+        return enqueue(kind, payload, priority)
+
+    monkeypatch.setattr(queue, "enqueue", crash_on_second_row)
+    with pytest.raises(KeyboardInterrupt):
+        scan_sources(queue, csv_paths=[str(path)])
+    assert queue.counts() == {}
+    assert queue.get_position(str(path)) is None
+
+
+def test_claim_follows_priority_then_age(queue):
+    queue.enqueue("pdf", {"path": "manuel.pdf"}, PRIORITY_BACKLOG)
+    queue.enqueue("jsonl", {"path": "a"}, PRIORITY_NORMAL)
+    queue.enqueue("csv", {"path": "panne-1"}, PRIORITY_URGENT)
+    queue.enqueue("csv", {"path": "panne-2"}, PRIORITY_URGENT)
+    assert [job["payload"]["path"] for job in drain(queue)] == ["panne-1", "panne-2", "a", "manuel.pdf"]
+
+
+def test_failed_job_is_retried_after_a_growing_delay(queue, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ingestion_queue.time, "time", lambda: now[0])
+    queue.enqueue("csv", {"path": "panne"}, PRIORITY_URGENT)
+    for attempt in range(1, MAX_ATTEMPTS):
+        job = queue.claim()
+        assert job["attempts"] == attempt
+        queue.fail(job, "erreur")
+        assert queue.claim() is None
+        now[0] += RETRY_DELAY * 2 ** (attempt - 1) - 1
+        assert queue.claim() is None
+        now[0] += 1
+    queue.fail(queue.claim(), "erreur")
+    assert queue.counts() == {"failed": 1}
+
+
+def test_pdf_job_resumes_after_the_last_checkpointed_page(queue, monkeypatch):
+    sent, failures = [], ["page 3"]
+
+    class Pipeline:
+        async def run_async(self, text):
+            if text in failures:
+                failures.remove(text)
+                raise RuntimeError("Neo4j indisponible")
+            sent.append(text)
+
+    async def pages(path):
+        for page_number in range(1, 5):
+            yield page_number, f"page {page_number}"
+
+    monkeypatch.setattr(ingest, "get_pipeline", lambda profile, tenant=None: (Pipeline(), None, None))
+    monkeypatch.setattr(pdf_streaming, "stream_pdf_pages", pages)
+    queue.enqueue("pdf", {"path": "manuel.pdf"}, PRIORITY_BACKLOG)
+    monkeypatch.setattr(ingestion_queue, "RETRY_DELAY", 0)
+
+    job = queue.claim()
+    with pytest.raises(RuntimeError):
+        asyncio.run(handle_pdf(job["payload"], checkpoint=lambda payload: queue.checkpoint(job["id"], payload)))
+    queue.fail(job, "erreur")
+    assert sent == ["page 1", "page 2"]
+
+    job = queue.claim()
+    assert job["payload"]["done_parts"] == 2
+    asyncio.run(handle_pdf(job["payload"], checkpoint=lambda payload: queue.checkpoint(job["id"], payload)))
+    assert sent == ["page 1", "page 2", "page 3", "page 4"]
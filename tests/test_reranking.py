@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+from load_test import LatencyModel, StubDriver, StubEmbedder
+from reranking import RerankingRetriever
+
+DIMENSIONS = 16
+
+
+@pytest.fixture
+def retriever():
+    latency = LatencyModel(0.0001, 0.0002, random.Random(0))
+    return RerankingRetriever(
+        driver=StubDriver(latency, DIMENSIONS, size=200),
+        index_name="my_vector_index",
+        embedder=StubEmbedder(latency, DIMENSIONS),
+        fetch_k=20,
+        token_budget=300,
+        date_property="date",
+    )
+
+
+def test_context_fits_the_token_budget(retriever):
+    result = retriever.search(query_text="Causes des pannes des machines Fette ?", top_k=5)
+    assert result.items
+    assert sum(retriever.count_tokens(item.content) for item in result.items) == result.metadata["context_tokens"]
+    assert result.metadata["context_tokens"] <= 300
+    # Seul le texte du chunk est envoyé au LLM
+    assert all(item.content.startswith("Intervention simulée") for item in result.items)
+
+
+def test_time_window_keeps_only_chunks_of_the_period(retriever):
+    result = retriever.search(query_text="pannes des 30 derniers jours", top_k=5)
+    start, end = result.metadata["time_window"]
+    assert result.items
+    assert all(start <= item.metadata["date"] <= end for item in result.items)
+
+
+def test_empty_time_window_returns_no_chunk_from_another_period(retriever):
+    result = retriever.search(query_text="pannes entre le 2019-01-01 et le 2019-02-01", top_k=5)
+    assert result.items == []
+    assert result.metadata["time_window"] == ["2019-01-01", "2019-02-01"]
+
+
+def test_time_window_is_ignored_when_no_chunk_is_dated(retriever):
+    retriever.has_dated_chunks = lambda: False
+    result = retriever.search(query_text="pannes entre le 2019-01-01 et le 2019-02-01", top_k=5)
+    assert result.items
+    assert result.metadata["time_window"] is None
+
+
+def test_candidate_embeddings_come_with_the_vector_search(retriever):
+    queries = []
+    execute_query = retriever.driver.execute_query
+
+    def recording_execute_query(query, *args, **kwargs):
+        queries.append(query)
+        return execute_query(query, *args, **kwargs)
+
+    retriever.driver.execute_query = recording_execute_query
+    retriever.search(query_text="Causes des pannes des machines Fette ?", top_k=5)
+    # Une seule requête : l'embedding fait partie des propriétés renvoyées par la recherche vectorielle
+    assert len(queries) == 1
+    assert "node {.text, .date, .embedding}" in queries[0]
@@ -0,0 +1,97 @@
+import re
+import datetime
+
+import pytest
+
+from temporal import BACKFILL_QUERY, backfill_chunk_dates, parse_time_window
+
+TODAY = datetime.date(2025, 10, 18)   # un samedi du 4e trimestre
+
+D = datetime.date
+
+CASES = [
+    # Plages et dates explicites
+    ("pannes entre le 2025-01-10 et le 2025-02-05", D(2025, 1, 10), D(2025, 2, 5)),
+    ("interventions du 05/02/2025 au 10/01/2025", D(2025, 1, 10), D(2025, 2, 5)),
+    ("fuites depuis le 2025-09-01", D(2025, 9, 1), TODAY),
+    ("pannes depuis mars", D(2025, 3, 1), TODAY),
+    ("pannes depuis novembre", D(2024, 11, 1), TODAY),
+    ("pannes depuis 2023", D(2023, 1, 1), TODAY),
+    # Périodes glissantes
+    ("les 30 derniers jours", D(2025, 9, 18), TODAY),
+    ("les deux dernières semaines", D(2025, 10, 4), TODAY),
+    ("les trois derniers mois", D(2025, 7, 18), TODAY),
+    # Périodes calendaires relatives
+    ("pannes du mois dernier", D(2025, 9, 1), D(2025, 9, 30)),
+    ("pannes de ce mois", D(2025, 10, 1), TODAY),
+    ("pannes du dernier trimestre", D(2025, 7, 1), D(2025, 9, 30)),
+    ("trimestre en cours", D(2025, 10, 1), TODAY),
+    ("la semaine dernière", D(2025, 10, 6), D(2025, 10, 12)),
+    ("l'année dernière", D(2024, 1, 1), D(2024, 12, 31)),
+    ("cette année", D(2025, 1, 1), TODAY),
+    ("hier", D(2025, 10, 17), D(2025, 10, 17)),
+    # Trimestres nommés
+    ("pannes du T3 2025", D(2025, 7, 1), D(2025, 9, 30)),
+    ("Q2 de 2024", D(2024, 4, 1), D(2024, 6, 30)),
+    ("bilan 2024-Q3", D(2024, 7, 1), D(2024, 9, 30)),
+    ("pannes du 2e trimestre", D(2025, 4, 1), D(2025, 6, 30)),
+    ("1er trimestre 2024", D(2024, 1, 1), D(2024, 3, 31)),
+    ("trimestre 4 de 2023", D(2023, 10, 1), D(2023, 12, 31)),
+    # Mois et années
+    ("pannes en mars", D(2025, 3, 1), D(2025, 3, 31)),
+    ("pannes en décembre", D(2024, 12, 1), D(2024, 12, 31)),
+    ("au mois de février 2024", D(2024, 2, 1), D(2024, 2, 29)),
+    ("pannes en 2023", D(2023, 1, 1), D(2023, 12, 31)),
+]
+
+NO_WINDOW = [
+    "Quelles sont les principales causes des pannes des machines Fette ?",
+    "Problème sur le poinçon T3 ?",
+    "pièce Q1 remplacée",
+    "Quel réglage pour la came Q4 ?",
+    "usure du poinçon t2 et de la matrice t1",
+    "Comment a été résolu le problème de maintenance ?",
+    "Quelles pièces remplacer sur la presse P2090 ?",
+    "les 10 dernières interventions",
+    "pannes entre le 31/02/2025 et le 05/03/2025",
+]
+
+
+@pytest.mark.parametrize("question,start,end", CASES)
+def test_time_window(question, start, end):
+    window = parse_time_window(question, today=TODAY)
+    assert window is not None
+    assert (window.start, window.end) == (start, end)
+
+
+@pytest.mark.parametrize("question", NO_WINDOW)
+def test_no_time_window(question):
+    assert parse_time_window(question, today=TODAY) is None
+
+
+def test_as_filter():
+    window = parse_time_window("pannes du mois dernier", today=TODAY)
+    assert window.as_filter() == {"date": {"$between": [D(2025, 9, 1), D(2025, 9, 30)]}}
+
+
+def test_backfill_query_formats_with_the_chunk_label():
+    query = BACKFILL_QUERY.format(label="`Tenant_fette_Chunk`")
+    assert "MATCH (c:`Tenant_fette_Chunk`)" in query
+    # Regex Cypher une fois la chaîne littérale décodée (\\d -> \d)
+    pattern = re.search(r"=~ '(.*)'", query).group(1).replace("\\\\", "\\")
+    assert re.fullmatch(pattern, "Case_12 - 2024-03-05 - Fuite d'huile\nsur la tourelle")
+    assert not re.fullmatch(pattern, "Case_12 - 03/05/2024 - Fuite d'huile")
+
+
+def test_backfill_chunk_dates_runs_until_no_chunk_is_left():
+    class Driver:
+        def __init__(self):
+            self.counts, self.queries = [3, 2, 0], []
+
+        def execute_query(self, query, **params):
+            self.queries.append(query)
+            return [{"count": self.counts.pop(0)}], None, ["count"]
+
+    driver = Driver()
+    assert backfill_chunk_dates(driver, label="Tenant_fette_Chunk") == 5
+    assert all("(c:`Tenant_fette_Chunk`)" in query for query in driver.queries)
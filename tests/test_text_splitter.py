@@ -0,0 +1,77 @@
+import random, asyncio
+
+import pytest
+
+from text_splitter import SemanticSplitter, chunk_metadata, document_chunk_index
+
+WORDS = ["pompe", "joint", "tourelle", "poinçon", "huile", "capteur", "vibration", "moteur", "came", "réglage"]
+
+
+def make_document(rng, n_sentences, long_every=7):
+    """Sections de phrases de longueurs variées, dont des phrases plus longues que max_tokens"""
+    sentences, lines = [], []
+    for i in range(n_sentences):
+        n_words = rng.randint(40, 60) if i % long_every == long_every - 1 else rng.randint(2, 12)
+        sentence = f"S{i} " + " ".join(rng.choice(WORDS) for _ in range(n_words)) + "."
+        sentences.append(sentence)
+        lines.append(sentence)
+        if rng.random() < 0.2:
+            lines.append("")
+    return sentences, "\n".join(lines) + "\nTail end here."
+
+
+def split(splitter, text):
+    return asyncio.run(splitter.run(text)).chunks
+
+
+@pytest.mark.parametrize("max_tokens", [20, 40, 80])
+@pytest.mark.parametrize("overlap_sentences", [0, 1, 2, 3])
+@pytest.mark.parametrize("seed", range(5))
+def test_every_sentence_is_in_a_chunk(max_tokens, overlap_sentences, seed):
+    sentences, text = make_document(random.Random(seed), 40)
+    splitter = SemanticSplitter(max_tokens=max_tokens, overlap_sentences=overlap_sentences)
+    chunks = split(splitter, text)
+
+    joined = " ".join(chunk.text for chunk in chunks)
+    for sentence in sentences:
+        if splitter.count_tokens(sentence) <= max_tokens:
+            assert sentence in joined
+        else:
+            # Phrase découpée par mots : chaque morceau se retrouve dans un chunk
+            assert all(word in joined for word in sentence.split(" "))
+    assert chunks[-1].text.endswith("Tail end here.")
+    assert [chunk.index for chunk in chunks] == list(range(len(chunks)))
+    assert all(splitter.count_tokens(chunk.text) <= max_tokens for chunk in chunks)
+
+
+@pytest.mark.parametrize("overlap_sentences", [0, 1, 2])
+def test_duplication_is_never_negative(overlap_sentences):
+    _, text = make_document(random.Random(0), 60)
+    splitter = SemanticSplitter(max_tokens=40, overlap_sentences=overlap_sentences)
+    split(splitter, text)
+    assert splitter.stats.duplicated_tokens >= 0
+    if not overlap_sentences:
+        assert splitter.stats.duplicated_tokens == 0
+
+
+def test_short_text_is_one_chunk_with_metadata():
+    splitter = SemanticSplitter(max_tokens=100)
+    with chunk_metadata({"date": "2025-01-02"}):
+        chunks = split(splitter, "Case_1 - 2025-01-02 - Technician_BB - Fuite - Joint")
+    assert len(chunks) == 1
+    assert chunks[0].metadata == {"date": "2025-01-02"}
+
+
+def test_pages_of_a_document_share_one_chunk_numbering():
+    splitter = SemanticSplitter(max_tokens=20)
+    _, text = make_document(random.Random(1), 10)
+    indexes = {}
+    with document_chunk_index():
+        for path in ("a.pdf", "b.pdf"):
+            for page in (1, 2):
+                with chunk_metadata({"path": path, "page": page}):
+                    chunks = split(splitter, text)
+                assert all(chunk.metadata == {"path": path, "page": page} for chunk in chunks)
+                indexes.setdefault(path, []).extend(chunk.index for chunk in chunks)
+    for path_indexes in indexes.values():
+        assert path_indexes == list(range(len(path_indexes)))
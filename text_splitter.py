@@ -0,0 +1,228 @@
+import re, contextvars
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from neo4j_graphrag.experimental.components.text_splitters.base import TextSplitter
+from neo4j_graphrag.experimental.components.types import TextChunk, TextChunks
+
+try:
+    import tiktoken
+except ImportError:  # repli sur une estimation si tiktoken n'est pas installé
+    tiktoken = None
+
+# Titres de sections : "2. Methods", "3.1 Results", "INTRODUCTION", "Abstract"...
+SECTION_PATTERN = re.compile(
+    r"^\s*(?:\d+(?:\.\d+)*\.?\s+[A-ZÀ-Ý][^.!?]{0,80}"
+    r"|[A-ZÀ-Ý][A-ZÀ-Ý0-9 ,'&\-]{3,80}"
+    r"|(?:Abstract|Résumé|Introduction|Background|Methods?|Results?|Discussion|Conclusions?|References|Bibliographie)\b.{0,60})\s*$"
+)
+# Fin de phrase suivie d'un début de phrase (majuscule, chiffre, guillemet, parenthèse)
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?;])\s+(?=[\"'«(\[A-ZÀ-Ý0-9])")
+
+# Métadonnées de l'enregistrement en cours (ex. date d'intervention), copiées sur chacun de ses chunks.
+# SimpleKGPipeline ne prend que du texte en entrée : elles sont propagées aux tâches du pipeline par contexte
+_chunk_metadata = contextvars.ContextVar("chunk_metadata", default=None)
+
+
+@contextmanager
+def chunk_metadata(metadata):
+    """Ajoute `metadata` aux chunks produits dans le bloc (propriétés des noeuds Chunk)"""
+    token = _chunk_metadata.set(metadata)
+    try:
+        yield
+    finally:
+        _chunk_metadata.reset(token)
+
+
+# Prochain index de chunk par document (métadonnée "path") : un document envoyé page par page garde une
+# numérotation continue de ses chunks au lieu de repartir de 0 à chaque page
+_document_chunk_index = contextvars.ContextVar("document_chunk_index", default=None)
+
+
+@contextmanager
+def document_chunk_index(start=None):
+    """Numérote à la suite les chunks de chaque document produits dans le bloc ; `start` ({path: index})
+    permet de reprendre un document interrompu. Retourne le dictionnaire {path: prochain index}."""
+    next_index = dict(start or {})
+    token = _document_chunk_index.set(next_index)
+    try:
+        yield next_index
+    finally:
+        _document_chunk_index.reset(token)
+
+
+def get_token_counter(model_name="gpt-4o-mini"):
+    """Retourne une fonction de comptage de tokens pour le modèle donné"""
+    if tiktoken is not None:
+        try:
+            encoding = tiktoken.encoding_for_model(model_name)
+        except KeyError:
+            encoding = tiktoken.get_encoding("o200k_base")
+        return lambda text: len(encoding.encode(text, disallowed_special=()))
+    # Environ 4 caractères par token pour l'anglais et le français
+    return lambda text: (len(text) + 3) // 4
+
+
+@dataclass
+class SplitStats:
+    """Statistiques cumulées du découpage, pour mesurer le coût de l'overlap"""
+    documents: int = 0
+    passthrough: int = 0
+    chunks: int = 0
+    source_tokens: int = 0
+    chunk_tokens: int = 0
+
+    @property
+    def duplicated_tokens(self):
+        return self.chunk_tokens - self.source_tokens
+
+    @property
+    def duplication_ratio(self):
+        return self.duplicated_tokens / self.source_tokens if self.source_tokens else 0.0
+
+    def report(self):
+        return (
+            f"{self.documents} documents ({self.passthrough} sans découpage), {self.chunks} chunks, "
+            f"{self.chunk_tokens} tokens envoyés pour {self.source_tokens} tokens source, "
+            f"{self.duplicated_tokens} tokens dupliqués par l'overlap ({self.duplication_ratio:.1%})"
+        )
+
+
+class SemanticSplitter(TextSplitter):
+    """Découpe le texte en suivant les sections et les phrases, avec une taille exprimée en tokens.
+
+    Les textes qui tiennent dans `max_tokens` (ex. une intervention GMAO) sont renvoyés tels quels
+    en un seul chunk. L'overlap est exprimé en phrases entières (0 par défaut).
+    """
+
+    def __init__(self, max_tokens=512, overlap_sentences=0, min_section_tokens=None, model_name="gpt-4o-mini"):
+        if max_tokens <= 0:
+            raise ValueError("max_tokens must be strictly greater than 0")
+        if overlap_sentences < 0:
+            raise ValueError("overlap_sentences must be positive or zero")
+        self.max_tokens = max_tokens
+        self.overlap_sentences = overlap_sentences
+        # En dessous de ce seuil, une section est fusionnée avec la suivante plutôt que d'ouvrir un chunk
+        self.min_section_tokens = max_tokens // 4 if min_section_tokens is None else min_section_tokens
+        self.count_tokens = get_token_counter(model_name)
+        self.stats = SplitStats()
+
+    @classmethod
+    def for_context(cls, prompt_template, context_window=128000, completion_tokens=4096,
+                    max_tokens=2000, model_name="gpt-4o-mini", **kwargs):
+        """Dimensionne les chunks pour que prompt + chunk + réponse tiennent dans le contexte du LLM"""
+        count_tokens = get_token_counter(model_name)
+        budget = context_window - count_tokens(prompt_template) - completion_tokens
+        if budget <= 0:
+            raise ValueError("The prompt template does not fit in the LLM context window")
+        return cls(max_tokens=min(max_tokens, budget), model_name=model_name, **kwargs)
+
+    async def run(self, text: str) -> TextChunks:
+        """Découpe un texte en chunks"""
+        self.stats.documents += 1
+
+        # Enregistrement court : aucun découpage
+        n_tokens = self.count_tokens(text)
+        if n_tokens <= self.max_tokens:
+            self.stats.passthrough += 1
+            self.stats.chunks += 1
+            self.stats.source_tokens += n_tokens
+            self.stats.chunk_tokens += n_tokens
+            return self._with_metadata([TextChunk(text=text, index=0)])
+
+        chunks = []
+        current = []  # liste de (phrase, nb_tokens)
+        current_tokens = 0
+        carried_tokens = 0  # tokens de `current` repris du chunk précédent (overlap)
+
+        def flush():
+            nonlocal current, current_tokens, carried_tokens
+            if not current:
+                return
+            chunks.append(TextChunk(text=" ".join(s for s, _ in current), index=len(chunks)))
+            self.stats.chunk_tokens += current_tokens
+            kept = current[-self.overlap_sentences:] if self.overlap_sentences else []
+            # L'overlap ne doit jamais occuper plus de la moitié d'un chunk
+            while kept and sum(t for _, t in kept) > self.max_tokens // 2:
+                kept = kept[1:]
+            current = list(kept)
+            current_tokens = carried_tokens = sum(t for _, t in kept)
+
+        for section in self._split_sections(text):
+            # Nouvelle section : on ferme le chunk courant s'il est déjà suffisamment rempli
+            if current_tokens - carried_tokens >= self.min_section_tokens:
+                flush()
+            for sentence in self._split_sentences(section):
+                sentence_tokens = self.count_tokens(sentence)
+                if current_tokens + sentence_tokens > self.max_tokens:
+                    flush()
+                    if current_tokens + sentence_tokens > self.max_tokens:
+                        # L'overlap ne laisse pas la place : on repart d'un chunk vide
+                        current, current_tokens, carried_tokens = [], 0, 0
+                if sentence_tokens > self.max_tokens:
+                    for piece in self._split_long_sentence(sentence):
+                        current = [(piece, self.count_tokens(piece))]
+                        current_tokens = current[0][1]
+                        # Les morceaux comptent comme source : l'overlap seul mesure la duplication
+                        self.stats.source_tokens += current_tokens
+                        flush()
+                    current, current_tokens, carried_tokens = [], 0, 0
+                    continue
+                self.stats.source_tokens += sentence_tokens
+                current.append((sentence, sentence_tokens))
+                current_tokens += sentence_tokens
+        # Il reste des phrases qui ne sont pas seulement l'overlap du dernier chunk
+        if current_tokens > carried_tokens or not chunks:
+            flush()
+
+        self.stats.chunks += len(chunks)
+        return self._with_metadata(chunks)
+
+    @staticmethod
+    def _with_metadata(chunks):
+        metadata = _chunk_metadata.get()
+        if metadata:
+            for chunk in chunks:
+                chunk.metadata = dict(metadata)
+        next_index = _document_chunk_index.get()
+        if metadata and metadata.get("path") and next_index is not None:
+            offset = next_index.get(metadata["path"], 0)
+            for chunk in chunks:
+                chunk.index += offset
+            next_index[metadata["path"]] = offset + len(chunks)
+        return TextChunks(chunks=chunks)
+
+    @staticmethod
+    def _split_sections(text):
+        """Regroupe les lignes en sections (ligne vide ou titre)"""
+        sections, lines = [], []
+        for line in text.splitlines():
+            if not line.strip() or SECTION_PATTERN.match(line):
+                if lines:
+                    sections.append(" ".join(lines))
+                lines = [line.strip()] if line.strip() else []
+            else:
+                lines.append(line.strip())
+        if lines:
+            sections.append(" ".join(lines))
+        return sections
+
+    @staticmethod
+    def _split_sentences(section):
+        """Découpe une section en phrases"""
+        section = re.sub(r"\s+", " ", section).strip()
+        return [s for s in SENTENCE_PATTERN.split(section) if s]
+
+    def _split_long_sentence(self, sentence):
+        """Découpe par mots une phrase plus longue que max_tokens (tableaux, listes PDF)"""
+        pieces, words, n_tokens = [], [], 0
+        for word in sentence.split(" "):
+            word_tokens = self.count_tokens(" " + word)
+            if words and n_tokens + word_tokens > self.max_tokens:
+                pieces.append(" ".join(words))
+                words, n_tokens = [], 0
+            words.append(word)
+            n_tokens += word_tokens
+        if words:
+            pieces.append(" ".join(words))
+        return pieces
@@ -0,0 +1,179 @@
+import os, json, time, hashlib, contextvars
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+
+REPORT_PATH = "data/usage_report.jsonl"
+
+# Tarifs OpenAI en USD par million de tokens : (entrée, sortie)
+PRICING = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "text-embedding-ada-002": (0.10, 0.0),
+    "text-embedding-3-small": (0.02, 0.0),
+    "text-embedding-3-large": (0.13, 0.0),
+}
+
+# Tracker et enregistrement en cours ; propagés aux tâches asyncio lancées par le pipeline
+_current_tracker = contextvars.ContextVar("usage_tracker", default=None)
+_current_record = contextvars.ContextVar("usage_record", default=None)
+
+
+def version_of(obj):
+    """Empreinte courte d'un prompt ou d'un schéma, pour comparer les versions entre runs"""
+    return hashlib.sha1(json.dumps(obj, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:8]
+
+
+@dataclass
+class Usage:
+    calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost: float = 0.0
+
+    def add(self, prompt_tokens, completion_tokens, cost):
+        self.calls += 1
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.cost += cost
+
+
+class UsageTracker:
+    """Compte les tokens et le coût des appels LLM et embedding, par enregistrement et pour le run"""
+
+    def __init__(self, script, schema_version=None, prompt_version=None):
+        self.script = script
+        self.schema_version = schema_version
+        self.prompt_version = prompt_version
+        self.started_at = time.time()
+        self.totals = defaultdict(Usage)   # "llm" / "embedding" -> Usage
+        self.records = defaultdict(lambda: defaultdict(Usage))
+
+    @contextmanager
+    def record(self, record_id):
+        """Attribue à ce tracker et à `record_id` tous les appels effectués dans le bloc (seuls ceux-ci sont comptés)"""
+        tracker_token = _current_tracker.set(self)
+        record_token = _current_record.set(record_id)
+        try:
+            yield
+        finally:
+            _current_record.reset(record_token)
+            _current_tracker.reset(tracker_token)
+
+    def add(self, kind, model, prompt_tokens, completion_tokens=0):
+        input_price, output_price = PRICING.get(model, (0.0, 0.0))
+        cost = (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+        self.totals[kind].add(prompt_tokens, completion_tokens, cost)
+        record_id = _current_record.get()
+        if record_id is not None:
+            self.records[record_id][kind].add(prompt_tokens, completion_tokens, cost)
+
+    def wrap_llm(self, llm):
+        """Instrumente les clients OpenAI (sync et async) d'un OpenAILLM ; les autres LLM sont ignorés"""
+        if not hasattr(llm, "async_client"):
+            return llm
+        self._instrument(llm.client.chat.completions, "llm", is_async=False)
+        self._instrument(llm.async_client.chat.completions, "llm", is_async=True)
+        return llm
+
+    def wrap_embedder(self, embedder):
+        """Instrumente le client OpenAI d'un OpenAIEmbeddings ; les autres embedders sont ignorés"""
+        if not hasattr(embedder, "client"):
+            return embedder
+        self._instrument(embedder.client.embeddings, "embedding", is_async=False)
+        return embedder
+
+    @staticmethod
+    def _instrument(resource, kind, is_async):
+        # Instrumenté une seule fois : le client peut être partagé entre plusieurs runs ou sessions
+        # (GraphRAG en cache de l'application), l'appel est compté par le tracker actif dans son contexte
+        if getattr(resource, "usage_instrumented", False):
+            return
+        resource.usage_instrumented = True
+        create = resource.create
+
+        def account(response, kwargs):
+            tracker = _current_tracker.get()
+            usage = getattr(response, "usage", None)
+            if tracker is not None and usage is not None:
+                tracker.add(
+                    kind,
+                    kwargs.get("model", getattr(response, "model", "")),
+                    usage.prompt_tokens or 0,
+                    getattr(usage, "completion_tokens", 0) or 0,
+                )
+            return response
+
+        if is_async:
+            async def tracked_create(*args, **kwargs):
+                return account(await create(*args, **kwargs), kwargs)
+        else:
+            def tracked_create(*args, **kwargs):
+                return account(create(*args, **kwargs), kwargs)
+        resource.create = tracked_create
+
+    def summary(self):
+        n_records = len(self.records)
+        total_cost = sum(usage.cost for usage in self.totals.values())
+        return {
+            "script": self.script,
+            "schema_version": self.schema_version,
+            "prompt_version": self.prompt_version,
+            "started_at": self.started_at,
+            "duration": time.time() - self.started_at,
+            "records": n_records,
+            "cost": total_cost,
+            "cost_per_record": total_cost / n_records if n_records else None,
+            "totals": {kind: asdict(usage) for kind, usage in self.totals.items()},
+            "per_record": {
+                record_id: {kind: asdict(usage) for kind, usage in usages.items()}
+                for record_id, usages in self.records.items()
+            },
+        }
+
+    def report(self):
+        parts = [f"{self.script} : {len(self.records)} enregistrements"]
+        for kind, usage in self.totals.items():
+            parts.append(
+                f"{kind} {usage.calls} appels, {usage.prompt_tokens} tokens prompt, "
+                f"{usage.completion_tokens} tokens réponse, {usage.cost:.4f} $"
+            )
+        return " - ".join(parts)
+
+    def save(self, path=REPORT_PATH):
+        """Ajoute le résumé du run au rapport local (sauf si aucun appel n'a été compté, ex. backends simulés)"""
+        if not self.totals:
+            return
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(self.summary(), ensure_ascii=False) + "\n")
+
+
+def print_report(path=REPORT_PATH):
+    """Agrège les runs par script, version de schéma et version de prompt"""
+    groups = defaultdict(lambda: {"runs": 0, "records": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost": 0.0})
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            run = json.loads(line)
+            group = groups[(run["script"], run["schema_version"], run["prompt_version"])]
+            group["runs"] += 1
+            group["records"] += run["records"]
+            group["cost"] += run["cost"]
+            for usage in run["totals"].values():
+                group["prompt_tokens"] += usage["prompt_tokens"]
+                group["completion_tokens"] += usage["completion_tokens"]
+
+    print(f"{'script':<26}{'schema':<10}{'prompt':<10}{'runs':>6}{'records':>9}"
+          f"{'prompt tok':>12}{'compl. tok':>12}{'cost $':>10}{'$/record':>11}")
+    for (script, schema_version, prompt_version), group in sorted(groups.items(), key=lambda g: str(g[0])):
+        per_record = group["cost"] / group["records"] if group["records"] else 0.0
+        print(f"{script:<26}{str(schema_version):<10}{str(prompt_version):<10}{group['runs']:>6}{group['records']:>9}"
+              f"{group['prompt_tokens']:>12}{group['completion_tokens']:>12}{group['cost']:>10.4f}{per_record:>11.6f}")
+
+
+if __name__ == "__main__":
+    if os.path.exists(REPORT_PATH):
+        print_report()
+    else:
+        print(f"Aucun rapport dans {REPORT_PATH}")